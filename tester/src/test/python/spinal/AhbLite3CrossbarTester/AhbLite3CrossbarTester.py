@@ -1,11 +1,11 @@
 import random
-from queue import Queue
 
 import cocotb
-from cocotb.triggers import RisingEdge
 from cocotblib.AhbLite3 import AhbLite3MasterDriver, AhbLite3SlaveMemory, AhbLite3TraficGenerator, AhbLite3MasterReadChecker
 
 from cocotblib.misc import ClockDomainAsyncReset, Bundle, simulationSpeedPrinter
+from spinal.common.Completion import CompletionCounter, AllOf
+from spinal.common.Fifo import Fifo
 
 
 class AhbLite3TraficGeneratorWithMemory(AhbLite3TraficGenerator):
@@ -45,6 +45,18 @@ class AhbLite3TraficGeneratorWithMemory(AhbLite3TraficGenerator):
         self.id = id
 
 
+# The read checker pops one entry per checked read, which is what checker.counter counts
+class CountedReadQueue(Fifo):
+    def __init__(self, completion):
+        Fifo.__init__(self)
+        self.completion = completion
+
+    def get(self):
+        item = Fifo.get(self)
+        self.completion.increment()
+        return item
+
+
 @cocotb.test()
 def test1(dut):
     dut.log.info("Cocotb test boot")
@@ -55,12 +67,14 @@ def test1(dut):
     cocotb.fork(simulationSpeedPrinter(dut.clk))
 
     drivers = []
-    checkers = []
+    completions = []
     for i in range(3):
-        readQueue = Queue()
+        completion = CompletionCounter(1000)
+        completions.append(completion)
+        readQueue = CountedReadQueue(completion)
         ahb = Bundle(dut, "ahbMasters_" + str(i))
         drivers.append(AhbLite3MasterDriver(ahb, AhbLite3TraficGeneratorWithMemory(14, 32,readQueue,i), dut.clk, dut.reset))
-        checkers.append(AhbLite3MasterReadChecker(ahb, readQueue, dut.clk, dut.reset))
+        AhbLite3MasterReadChecker(ahb, readQueue, dut.clk, dut.reset)
 
     # AhbLite3MasterIdle(Bundle(dut, "ahbMasters_1"))
     # AhbLite3MasterIdle(Bundle(dut, "ahbMasters_2"))
@@ -69,13 +83,6 @@ def test1(dut):
     AhbLite3SlaveMemory(Bundle(dut, "ahbSlaves_2"), 0x2000, 0x1000, dut.clk, dut.reset)
     AhbLite3SlaveMemory(Bundle(dut, "ahbSlaves_3"), 0x3000, 0x1000, dut.clk, dut.reset)
 
-    while True:
-        yield RisingEdge(dut.clk)
-        done = True
-        for checker in checkers:
-            if checker.counter < 1000:
-                done = False
-        if done:
-            break
+    yield AllOf(completions).wait()
 
     dut.log.info("Cocotb test done")
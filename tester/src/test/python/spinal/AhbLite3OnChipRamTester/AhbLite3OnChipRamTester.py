@@ -1,11 +1,11 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb.triggers import RisingEdge
 from cocotblib.AhbLite3 import AhbLite3MasterDriver, AhbLite3TraficGenerator, AhbLite3MasterReadChecker, AhbLite3Terminaison
 
 from cocotblib.misc import ClockDomainAsyncReset, Bundle, simulationSpeedPrinter
+from spinal.common.Fifo import Fifo
 
 
 class AhbLite3TraficGeneratorWithMemory(AhbLite3TraficGenerator):
@@ -72,7 +72,7 @@ def test1(dut):
 
     cocotb.fork(ClockDomainAsyncReset(dut.clk, dut.reset))
 
-    readQueue = Queue()
+    readQueue = Fifo()
     ahb = Bundle(dut, "ahb")
     driver  = AhbLite3MasterDriver(ahb, AhbLite3TraficGeneratorWithMemory(10, 32,readQueue), dut.clk, dut.reset)
     checker = AhbLite3MasterReadChecker(ahb, readQueue, dut.clk, dut.reset)
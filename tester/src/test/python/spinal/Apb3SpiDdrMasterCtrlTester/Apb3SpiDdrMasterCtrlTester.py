@@ -1,11 +1,11 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb.triggers import Edge, RisingEdge, FallingEdge, Timer
 
 from cocotblib.Apb3 import Apb3
 from cocotblib.misc import assertEquals, ClockDomainAsyncReset, simulationSpeedPrinter, waitClockedCond
+from spinal.common.Fifo import Fifo
 
 
 @cocotb.coroutine
@@ -273,7 +273,7 @@ def test1(dut):
         dut.io_xip_cmd_valid <= False
 
 
-    xipRspRef = Queue()
+    xipRspRef = Fifo()
     @cocotb.coroutine
     def xipRspScoreboard():
         while True:
@@ -1,24 +1,36 @@
 import random
-from queue import Queue
 
 import cocotb
-from cocotb.triggers import Timer, RisingEdge
+from cocotb.result import TestFailure
+from cocotb.triggers import Timer
 from cocotblib.Axi4 import Axi4
 from cocotblib.misc import ClockDomainAsyncReset, simulationSpeedPrinter, randBits, BoolRandomizer, assertEquals
 
-from cocotblib.Stream import StreamDriverSlave, StreamDriverMaster, Transaction, StreamMonitor
+from cocotblib.Stream import Transaction
+from spinal.common.IdQueues import IdQueues
+from spinal.common.WriteReconciler import WriteReconciler, WriteBurstAssembler
+from spinal.common.Completion import CompletionCondition
+from spinal.common.Fifo import Fifo
+from spinal.common.StreamAgents import StreamDriverSlave, StreamDriverMaster, StreamMonitor
+
+decodeErrorAddress = 1 << 12
+
+
+def slaveOf(address):
+    return address >> 10
 
 
 class MasterHandle:
-    def __init__(self,id,idToWrites):
+    def __init__(self,id,idToWrites,completion):
         self.hid = id
         self.readCounter = 0
         self.writeCounter = 0
         self.doFinish = False
-        self.readMonitorQueues = [Queue() for i in range(4)] # One queue for each transaction id
-        self.writeCmdQueue = Queue()
-        self.writeDataQueue = Queue()
+        self.readMonitorQueues = [Fifo() for i in range(4)] # One queue for each transaction id
+        self.writeCmdQueue = Fifo()
+        self.writeDataQueue = Fifo()
         self.idToWrites = idToWrites
+        self.completion = completion
         self.readCmdIdleRand = BoolRandomizer()
         self.writeCmdIdleRand = BoolRandomizer()
         self.writeDataIdleRand = BoolRandomizer()
@@ -40,7 +52,7 @@ class MasterHandle:
         writeCmd = Transaction()
         writeCmd.addr = self.genRandomAddress()
         if random.random() < 0.1: # Random assertion of decoding error
-            writeCmd.addr = 1 << 12
+            writeCmd.addr = decodeErrorAddress
         writeCmd.hid = self.hid*4 + idOffset #Each master can use 4 id
         writeCmd.region = randBits(4)
         writeCmd.len = randBits(4)
@@ -61,21 +73,25 @@ class MasterHandle:
             self.writeDataQueue.put(writeData)
             writeCmd.linkedDatas.append(writeData)
 
-        self.idToWrites[writeCmd.hid].append(writeCmd)
+        self.idToWrites.add(writeCmd.hid, slaveOf(writeCmd.addr), writeCmd)
 
     def getNextWriteCmdTrans(self):
         if(self.writeCmdQueue.empty()):
             if self.doFinish:
                 return None
             self.genWrite()
-        return self.writeCmdQueue.get()
+        trans = self.writeCmdQueue.get()
+        self.completion.check()
+        return trans
 
     def getNextWriteDataTrans(self):
         if(self.writeDataQueue.empty()):
             if self.doFinish:
                 return None
             self.genWrite()
-        return self.writeDataQueue.get()
+        trans = self.writeDataQueue.get()
+        self.completion.check()
+        return trans
 
 
 
@@ -112,7 +128,7 @@ class MasterHandle:
 
     def onReadRsp(self, trans):
         queue = self.readMonitorQueues[trans.hid - self.hid * 4]
-        task = queue.queue[0]
+        task = queue.peek()
         if task.addr != 1 << 12:
             assertEquals(trans.data,task.addr + task.progress,"Readed value is wrong")
         else:
@@ -124,6 +140,7 @@ class MasterHandle:
             queue.get()
             self.readCounter += 1
             self.updateDoFinish()
+            self.completion.check()
 
 
 
@@ -140,11 +157,12 @@ class MasterHandle:
     def onWriteRsp(self,trans):
         self.writeCounter = self.writeCounter + 1
         if trans.resp == 3:
-            write = self.idToWrites[trans.hid][0]
-            assertEquals(write.addr,(1<<12),"ERROR ?")
-            self.idToWrites[trans.hid].remove(write)
+            write = self.idToWrites.retire(trans.hid, slaveOf(decodeErrorAddress))
+            if write is None:
+                raise TestFailure("Unexpected decode error on write id %d" % trans.hid)
 
         self.updateDoFinish()
+        self.completion.check()
 
     def updateDoFinish(self):
         if self.readCounter > 100 and self.writeCounter > 100:
@@ -152,26 +170,20 @@ class MasterHandle:
 
 
 class SlaveHandle:
-    def __init__(self,id,idToWrites):
-        self.tasksQueues = [Queue()] * 64 # One queue of task for each transaction id
+    def __init__(self,id,idToWrites,completion):
+        self.tasks = IdQueues() # One queue of task for each transaction id
         self.hid = id
-        self.writeCmds = []
-        self.writeDatas = []
+        self.writes = WriteBurstAssembler()
         self.idToWrites = idToWrites
+        self.completion = completion
         self.readRspIdleRand = BoolRandomizer()
         self.writeRspIdleRand = BoolRandomizer()
 
-    def getRandTaskList(self):
-        tasksQueuesFiltred = [tasksList for tasksList in self.tasksQueues if not tasksList.empty()]
-        if len(tasksQueuesFiltred) == 0:
-            return None
-        return random.choice(tasksQueuesFiltred)
-
     def genReadRsp(self):
-        tasksQueue = self.getRandTaskList()
-        if tasksQueue:
+        hid = self.tasks.randomId()
+        if hid is not None:
             if self.readRspIdleRand.get():
-                task = tasksQueue.queue[0]
+                task = self.tasks.peek(hid)
                 trans = Transaction()
                 trans.data = task.addr + task.progress
                 trans.resp = 0
@@ -179,7 +191,7 @@ class SlaveHandle:
                 task.progress += 1
                 if task.progress == task.len + 1:
                     trans.last = 1
-                    tasksQueue.get()
+                    self.tasks.get(hid)
                 else:
                     trans.last = 0
                 return trans
@@ -188,36 +200,33 @@ class SlaveHandle:
     def onReadCmd(self, trans):
         trans.progress = 0
         assertEquals(trans.addr >> 10, self.hid, ":(")
-        self.tasksQueues[trans.hid].put(trans)
+        self.tasks.put(trans.hid, trans)
 
 
     def onWriteCmd(self,trans):
         assertEquals(trans.addr >> 10, self.hid, ":(")
-        self.writeCmds.append(trans)
+        self.writes.addCmd(trans)
 
     def onWriteData(self, trans):
-        self.writeDatas.append(trans)
+        self.writes.addData(trans)
 
     def genWriteRsp(self):
-        if len(self.writeCmds) != 0:
+        if len(self.writes.cmds) != 0:
             if not self.writeRspIdleRand.get():
                 return None
-            cmd = self.writeCmds[0]
-            beatCount = cmd.len + 1
-            if len(self.writeDatas) >= beatCount:
-                datas = self.writeDatas[0:beatCount-1]
+            burst = self.writes.pop()
+            if burst:
+                cmd, datas = burst
 
                 #Check it
-                masterWrite = next(write for write in self.idToWrites[cmd.hid & 0xF] if write.addr >> 10 == self.hid)
+                masterWrite = self.idToWrites.retire(cmd.hid & 0xF, self.hid)
+                if masterWrite is None:
+                    raise TestFailure("No pending master write for id %d on slave %d" % (cmd.hid & 0xF, self.hid))
                 assertEquals(cmd.addr,masterWrite.addr,"write cmd mismatch")
                 assertEquals(cmd.len, masterWrite.len, "write cmd mismatch")
                 for data, dataRef in zip(datas, masterWrite.linkedDatas):
                     assertEquals(data.data, dataRef.data, "write data mismatch")
-
-                #Clean
-                self.writeCmds = self.writeCmds[1:]
-                self.writeDatas = self.writeDatas[beatCount:]
-                self.idToWrites[cmd.hid & 0xF].remove(masterWrite)
+                self.completion.check()
 
                 #Answer
                 trans = Transaction()
@@ -239,11 +248,12 @@ def test1(dut):
     axiSlaves = [Axi4(dut, "axiSlaves_" + str(i)) for i in range(4)]
 
     masterHandles = []
-    idToWrites = [[] for i in range(16)]
+    idToWrites = WriteReconciler()
+    completion = CompletionCondition(lambda: idToWrites.empty() and all(handle.isCompleted() for handle in masterHandles))
 
     # Instanciate master side
     for idx,axiMaster in enumerate(axiMasters):
-        masterHandle = MasterHandle(idx,idToWrites)
+        masterHandle = MasterHandle(idx,idToWrites,completion)
         masterHandles.append(masterHandle)
 
         # Read
@@ -262,7 +272,7 @@ def test1(dut):
     for idx,axiSlave in enumerate(axiSlaves):
         axiSlave.r.payload.hid <= 0
         axiSlave.b.payload.hid <= 0
-        slaveHandle = SlaveHandle(idx,idToWrites)
+        slaveHandle = SlaveHandle(idx,idToWrites,completion)
 
         # Read
         StreamDriverSlave(axiSlave.ar, dut.clk, dut.reset)
@@ -277,18 +287,7 @@ def test1(dut):
         StreamDriverMaster(axiSlave.b, slaveHandle.genWriteRsp, dut.clk, dut.reset)
 
     # Run until completion
-    while True:
-        yield RisingEdge(dut.clk)
-        done = True
-        for handle in masterHandles:
-            if not handle.isCompleted():
-                done = False
-
-        for l in idToWrites:
-            if l:
-                done = False
-        if done:
-            break
+    yield completion.wait()
 
     yield Timer(1000*10)
 
@@ -3,13 +3,16 @@ import random
 import cocotb
 from cocotb.result import TestFailure
 from cocotblib.Axi4 import Axi4, Axi4ReadOnly, Axi4WriteOnly, Axi4Shared
-from cocotblib.Phase import PhaseManager, Infrastructure, PHASE_CHECK_SCORBOARDS
+from cocotblib.Phase import Infrastructure, PHASE_CHECK_SCORBOARDS
 from cocotblib.misc import ClockDomainAsyncReset, simulationSpeedPrinter
 
 from spinal.Axi4CrossbarTester2.MasterDriver import WriteOnlyMasterDriver, ReadOnlyMasterDriver, SharedMasterDriver
 from spinal.Axi4CrossbarTester2.MasterMonitor import ReadOnlyMasterMonitor, WriteOnlyMasterMonitor, SharedMasterMonitor
 from spinal.Axi4CrossbarTester2.SlaveMonitor import WriteDataMonitor, SharedDataMonitor
 from spinal.Axi4CrossbarTester2.SlavesDriver import ReadOnlySlaveDriver, WriteOnlySlaveDriver, SharedSlaveDriver
+from spinal.Axi4CrossbarTester2.Coverage import AxiCoverage
+from spinal.common.Coverage import CoverageGoal
+from spinal.common.Phase import PhaseManager
 
 
 @cocotb.coroutine
@@ -51,6 +54,8 @@ def test1(dut):
 
     phaseManager = PhaseManager()
     phaseManager.setWaitTasksEndTime(1000*2000)
+    coverage = AxiCoverage()
+    CoverageGoal("coverage", phaseManager, coverage, timeout=1000*1000*20)
 
     axiMasters = [Axi4(dut, "axiMasters_" + str(i)) for i in range(2)]
     axiSlaves = [Axi4(dut, "axiSlaves_" + str(i)) for i in range(2)]
@@ -68,39 +73,39 @@ def test1(dut):
 
     # Instanciate master sides
     for idx,axiMaster in enumerate(axiMasters):
-        WriteOnlyMasterDriver("Axi4WriteMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut).createInfrastructure()
-        ReadOnlyMasterDriver("Axi4ReadMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut).createInfrastructure()
-        ReadOnlyMasterMonitor("Axi4ReadMasterMonitor" + str(idx), phaseManager, axiMaster, dut).createInfrastructure()
-        WriteOnlyMasterMonitor("Axi4WriteMasterMonitor" + str(idx), phaseManager, axiMaster, dut).createInfrastructure()
+        WriteOnlyMasterDriver("Axi4WriteMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut, coverage).createInfrastructure()
+        ReadOnlyMasterDriver("Axi4ReadMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut, coverage).createInfrastructure()
+        ReadOnlyMasterMonitor("Axi4ReadMasterMonitor" + str(idx), phaseManager, axiMaster, dut, coverage).createInfrastructure()
+        WriteOnlyMasterMonitor("Axi4WriteMasterMonitor" + str(idx), phaseManager, axiMaster, dut, coverage).createInfrastructure()
 
     for idx,axiMaster in enumerate(axiReadOnlyMasters):
-        ReadOnlyMasterDriver("ReadOnlyMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut).createInfrastructure()
-        ReadOnlyMasterMonitor("ReadOnlyMasterMonitor" + str(idx),phaseManager,axiMaster,dut).createInfrastructure()
+        ReadOnlyMasterDriver("ReadOnlyMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut, coverage).createInfrastructure()
+        ReadOnlyMasterMonitor("ReadOnlyMasterMonitor" + str(idx),phaseManager,axiMaster,dut, coverage).createInfrastructure()
 
     for idx,axiMaster in enumerate(axiWriteOnlyMasters):
-        WriteOnlyMasterDriver("WriteOnlyMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut).createInfrastructure()
-        WriteOnlyMasterMonitor("WriteOnlyMasterMonitor" + str(idx), phaseManager, axiMaster, dut).createInfrastructure()
+        WriteOnlyMasterDriver("WriteOnlyMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut, coverage).createInfrastructure()
+        WriteOnlyMasterMonitor("WriteOnlyMasterMonitor" + str(idx), phaseManager, axiMaster, dut, coverage).createInfrastructure()
 
     for idx,axiMaster in enumerate(axiSharedMasters):
-        SharedMasterDriver("SharedMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut).createInfrastructure()
-        SharedMasterMonitor("SharedMasterMonitor" + str(idx), phaseManager, axiMaster, dut).createInfrastructure()
+        SharedMasterDriver("SharedMasterDriver" + str(idx),phaseManager,0 + idx * 0, axiMaster, dut, coverage).createInfrastructure()
+        SharedMasterMonitor("SharedMasterMonitor" + str(idx), phaseManager, axiMaster, dut, coverage).createInfrastructure()
 
 
 
     for idx,axiSlave in enumerate(axiSlaves):
-        WriteOnlySlaveDriver(axiSlave,0x0000 + idx*0x0800,0x0800, dut).createInfrastructure()
-        ReadOnlySlaveDriver(axiSlave,0x0000 + idx*0x0800,0x0800, dut).createInfrastructure()
+        WriteOnlySlaveDriver(axiSlave,0x0000 + idx*0x0800,0x0800, dut, "Axi4WriteSlaveDriver" + str(idx), phaseManager).createInfrastructure()
+        ReadOnlySlaveDriver(axiSlave,0x0000 + idx*0x0800,0x0800, dut, "Axi4ReadSlaveDriver" + str(idx), phaseManager).createInfrastructure()
         WriteDataMonitor("Axi4DataSlaveMonitor" + str(idx), phaseManager, axiSlave, dut).createInfrastructure()
 
     for idx,axiSlave in enumerate(axiReadOnlySlaves):
-        ReadOnlySlaveDriver(axiSlave,0x2000 + idx*0x0800,0x0800, dut).createInfrastructure()
+        ReadOnlySlaveDriver(axiSlave,0x2000 + idx*0x0800,0x0800, dut, "ReadOnlySlaveDriver" + str(idx), phaseManager).createInfrastructure()
 
     for idx,axiSlave in enumerate(axiWriteOnlySlaves):
-        WriteOnlySlaveDriver(axiSlave,0x3000 + idx*0x0800,0x0800, dut).createInfrastructure()
+        WriteOnlySlaveDriver(axiSlave,0x3000 + idx*0x0800,0x0800, dut, "WriteOnlySlaveDriver" + str(idx), phaseManager).createInfrastructure()
         WriteDataMonitor("WriteOnlySlaveMonitor" + str(idx),phaseManager,axiSlave,dut).createInfrastructure()
 
     for idx,axiSlave in enumerate(axiSharedSlaves):
-        SharedSlaveDriver(axiSlave,0x1000 + idx*0x0800,0x0800, dut).createInfrastructure()
+        SharedSlaveDriver(axiSlave,0x1000 + idx*0x0800,0x0800, dut, "SharedSlaveDriver" + str(idx), phaseManager).createInfrastructure()
         SharedDataMonitor("SharedSlaveMonitor" + str(idx), phaseManager, axiSlave, dut).createInfrastructure()
 
     # cocotb.log.error("miaou")
@@ -0,0 +1,55 @@
+from spinal.common.Coverage import Coverage
+
+decodeErrorAddress = 1 << 14
+readSlaves = [0, 1, 2, 3, 4, 5]   # axiSlaves, axiSharedSlaves, axiReadOnlySlaves
+writeSlaves = [0, 1, 2, 3, 6, 7]  # axiSlaves, axiSharedSlaves, axiWriteOnlySlaves
+depthBuckets = [1, 2, 4]
+
+
+def slaveOf(address):
+    return address >> 11
+
+
+def depthBucket(depth):
+    return min(1 << (depth.bit_length() - 1), depthBuckets[-1])
+
+
+class AxiCoverage(Coverage):
+    def __init__(self, name = "axi", goal = 4):
+        Coverage.__init__(self, name)
+        self.addPoint("len", range(16), goal)
+        self.addPoint("size", range(8), goal)
+        self.addPoint("burst", range(4), goal)
+        self.addPoint("id", range(4), goal)
+        self.addPoint("decodeError", ["read", "write"], goal)
+        self.routes = self.addPoint("route", [], goal)
+        self.depths = self.addPoint("depth", [], goal)
+
+    # Register the route and outstanding depth bins of one master port
+    def addMaster(self, master, read, write):
+        kinds = []
+        if read:
+            kinds.append("read")
+            for slave in readSlaves:
+                self.routes.addBin((master, "read", slave))
+        if write:
+            kinds.append("write")
+            for slave in writeSlaves:
+                self.routes.addBin((master, "write", slave))
+        for kind in kinds:
+            for bucket in depthBuckets:
+                self.depths.addBin((master, kind, bucket))
+
+    def sampleCmd(self, master, kind, cmd):
+        self.points["len"].sample(cmd.len)
+        self.points["size"].sample(cmd.size)
+        self.points["burst"].sample(cmd.burst)
+        self.points["id"].sample(cmd.hid & 0x3)
+        if cmd.addr >= decodeErrorAddress:
+            self.points["decodeError"].sample(kind)
+        else:
+            self.routes.sample((master, kind, slaveOf(cmd.addr)))
+
+    def sampleDepth(self, master, kind, depth):
+        if depth > 0:
+            self.depths.sample((master, kind, depthBucket(depth)))
@@ -1,22 +1,28 @@
-import random
-from queue import Queue
-
 from cocotblib.Phase import Infrastructure, PHASE_WAIT_TASKS_END
-from cocotblib.misc import randBits, BoolRandomizer
+from cocotblib.misc import BoolRandomizer
+
+from spinal.common.Fifo import Fifo
+from spinal.common.Records import streamRecord
+from spinal.common.StimulusPool import StimulusPool
+from spinal.common.StreamAgents import StreamDriverSlave, StreamDriverMaster
 
-from cocotblib.Stream import StreamDriverSlave, StreamDriverMaster, Transaction
+axiCmdFields = ("addr", "hid", "region", "len", "size", "burst", "lock", "cache", "qos", "prot")
+axiWriteDataFields = ("data", "strb", "last")
 
 
 class WriteOnlyMasterDriver(Infrastructure):
-    def __init__(self,name,parent,idBase,axi,dut):
+    def __init__(self,name,parent,idBase,axi,dut,coverage = None):
         Infrastructure.__init__(self,name,parent)
         self.dut = dut
+        self.coverage = coverage
         self.axi = axi
         self.idBase = idBase
-        self.writeCmdQueue = Queue()
-        self.writeDataQueue = Queue()
+        self.writeCmdQueue = Fifo()
+        self.writeDataQueue = Fifo()
         self.writeCmdIdleRand = BoolRandomizer()
         self.writeDataIdleRand = BoolRandomizer()
+        self.writePool = StimulusPool()
+        self.streamMasters = []
         self.closeIt = False
 
     def startPhase(self, phase):
@@ -24,37 +30,51 @@ class WriteOnlyMasterDriver(Infrastructure):
         if phase == PHASE_WAIT_TASKS_END:
             self.closeIt = True
 
+    # Beats popped from the queues stay invisible to the scoreboards until the bus accepts them
+    def isQuiescent(self):
+        return self.writeCmdQueue.empty() and self.writeDataQueue.empty() and not any(master.valid for master in self.streamMasters)
+
+    def biased(self, name, pool, value):
+        if self.coverage is None:
+            return value
+        return self.coverage.bias(name, pool, value)
+
     def createInfrastructure(self):
-        StreamDriverMaster(self.axi.aw, self.genWriteCmd, self.dut.clk, self.dut.reset)
-        StreamDriverMaster(self.axi.w, self.genWriteData, self.dut.clk, self.dut.reset)
+        self.writeCmdRecord = streamRecord(self.axi.aw, "Axi4WriteCmd", axiCmdFields)
+        self.writeDataRecord = streamRecord(self.axi.w, "Axi4WriteData", axiWriteDataFields)
+        self.streamMasters = [
+            StreamDriverMaster(self.axi.aw, self.genWriteCmd, self.dut.clk, self.dut.reset),
+            StreamDriverMaster(self.axi.w, self.genWriteData, self.dut.clk, self.dut.reset)]
         StreamDriverSlave(self.axi.b, self.dut.clk, self.dut.reset)
         return self
 
     def genRandomWriteAddress(self):
-        if random.random() < 0.1: # Random assertion of decoding error
+        pool = self.writePool
+        if pool.bool(0.1): # Random assertion of decoding error
             return 1 << 14
-        return randBits(12) + random.choice([0,1,3])*0x1000
+        return pool.bits(12) + pool.choice([0,1,3])*0x1000
 
     def genWrite(self):
-        idOffset = randBits(2)
-        writeCmd = Transaction()
-        writeCmd.addr = self.genRandomWriteAddress()
-        writeCmd.hid = self.idBase + idOffset #Each master can use 4 id
-        writeCmd.region = randBits(4)
-        writeCmd.len = randBits(4)
-        writeCmd.size = randBits(3)
-        writeCmd.burst = randBits(2)
-        writeCmd.lock = randBits(1)
-        writeCmd.cache = randBits(4)
-        writeCmd.qos = randBits(4)
-        writeCmd.prot = randBits(3)
+        pool = self.writePool
+        idOffset = pool.bits(2)
+        writeCmd = self.writeCmdRecord(
+            addr = self.genRandomWriteAddress(),
+            hid = self.idBase + idOffset, #Each master can use 4 id
+            region = pool.bits(4),
+            len = self.biased("len", pool, pool.bits(4)),
+            size = self.biased("size", pool, pool.bits(3)),
+            burst = self.biased("burst", pool, pool.bits(2)),
+            lock = pool.bits(1),
+            cache = pool.bits(4),
+            qos = pool.bits(4),
+            prot = pool.bits(3))
         self.writeCmdQueue.put(writeCmd)
 
         for i in range(writeCmd.len + 1):
-            writeData = Transaction()
-            writeData.data = writeCmd.addr + i
-            writeData.strb = (writeCmd.addr + i) & 0xF
-            writeData.last = 1 if i == writeCmd.len else 0
+            writeData = self.writeDataRecord(
+                data = writeCmd.addr + i,
+                strb = (writeCmd.addr + i) & 0xF,
+                last = 1 if i == writeCmd.len else 0)
             self.writeDataQueue.put(writeData)
 
     def getNextWriteCmdTrans(self):
@@ -84,13 +104,16 @@ class WriteOnlyMasterDriver(Infrastructure):
 
 
 class ReadOnlyMasterDriver(Infrastructure):
-    def __init__(self,name,parent,idBase,axi,dut):
+    def __init__(self,name,parent,idBase,axi,dut,coverage = None):
         Infrastructure.__init__(self,name,parent)
+        self.coverage = coverage
         self.idBase = idBase
         self.axi = axi
         self.dut = dut
         self.closeIt = False
         self.readCmdIdleRand = BoolRandomizer()
+        self.readPool = StimulusPool()
+        self.streamMasters = []
 
     def startPhase(self, phase):
         Infrastructure.startPhase(self, phase)
@@ -99,14 +122,24 @@ class ReadOnlyMasterDriver(Infrastructure):
 
 
     def createInfrastructure(self):
-        StreamDriverMaster(self.axi.ar, self.genReadCmd, self.dut.clk, self.dut.reset)
+        self.readCmdRecord = streamRecord(self.axi.ar, "Axi4ReadCmd", axiCmdFields)
+        self.streamMasters = [StreamDriverMaster(self.axi.ar, self.genReadCmd, self.dut.clk, self.dut.reset)]
         StreamDriverSlave(self.axi.r, self.dut.clk, self.dut.reset)
         return self
 
+    def isQuiescent(self):
+        return not any(master.valid for master in self.streamMasters)
+
+    def biased(self, name, pool, value):
+        if self.coverage is None:
+            return value
+        return self.coverage.bias(name, pool, value)
+
     def genRandomReadAddress(self):
-        if random.random() < 0.1: # Random assertion of decoding error
+        pool = self.readPool
+        if pool.bool(0.1): # Random assertion of decoding error
             return 1 << 14
-        return randBits(12) + random.choice([0,1,2])*0x1000
+        return pool.bits(12) + pool.choice([0,1,2])*0x1000
 
     def genReadCmd(self):
         if self.closeIt:
@@ -114,32 +147,36 @@ class ReadOnlyMasterDriver(Infrastructure):
         if not self.readCmdIdleRand.get():
             return None
 
-        idOffset = randBits(2)
-        trans = Transaction()
-        trans.addr = self.genRandomReadAddress()
-        trans.hid = self.idBase*4 + idOffset #Each master can use 4 id
-        trans.region = randBits(4)
-        trans.len = randBits(4)
-        trans.size = randBits(3)
-        trans.burst = randBits(2)
-        trans.lock = randBits(1)
-        trans.cache = randBits(4)
-        trans.qos = randBits(4)
-        trans.prot = randBits(3)
-        return trans
+        pool = self.readPool
+        idOffset = pool.bits(2)
+        return self.readCmdRecord(
+            addr = self.genRandomReadAddress(),
+            hid = self.idBase*4 + idOffset, #Each master can use 4 id
+            region = pool.bits(4),
+            len = self.biased("len", pool, pool.bits(4)),
+            size = self.biased("size", pool, pool.bits(3)),
+            burst = self.biased("burst", pool, pool.bits(2)),
+            lock = pool.bits(1),
+            cache = pool.bits(4),
+            qos = pool.bits(4),
+            prot = pool.bits(3))
 
 
 
 class SharedMasterDriver(WriteOnlyMasterDriver, ReadOnlyMasterDriver):
-    def __init__(self,name,parent,idBase,axi,dut):
-        WriteOnlyMasterDriver.__init__(self,name,parent, idBase, axi, dut)
-        ReadOnlyMasterDriver.__init__(self,name,parent, idBase, axi, dut)
+    def __init__(self,name,parent,idBase,axi,dut,coverage = None):
+        WriteOnlyMasterDriver.__init__(self,name,parent, idBase, axi, dut, coverage)
+        ReadOnlyMasterDriver.__init__(self,name,parent, idBase, axi, dut, coverage)
         self.readOrWriteRand = BoolRandomizer()
 
 
     def createInfrastructure(self):
-        StreamDriverMaster(self.axi.arw, self.genSharedCmd, self.dut.clk, self.dut.reset)
-        StreamDriverMaster(self.axi.w, self.genWriteData, self.dut.clk, self.dut.reset)
+        self.writeCmdRecord = streamRecord(self.axi.arw, "Axi4SharedCmd", axiCmdFields + ("write",))
+        self.readCmdRecord = self.writeCmdRecord
+        self.writeDataRecord = streamRecord(self.axi.w, "Axi4WriteData", axiWriteDataFields)
+        self.streamMasters = [
+            StreamDriverMaster(self.axi.arw, self.genSharedCmd, self.dut.clk, self.dut.reset),
+            StreamDriverMaster(self.axi.w, self.genWriteData, self.dut.clk, self.dut.reset)]
         StreamDriverSlave(self.axi.b, self.dut.clk, self.dut.reset)
         StreamDriverSlave(self.axi.r, self.dut.clk, self.dut.reset)
         return self
@@ -1,25 +1,35 @@
 from cocotblib.Phase import Infrastructure
-from cocotblib.Scorboard import ScorboardOutOfOrder
-
-from cocotblib.Stream import Transaction, StreamMonitor
+from spinal.common.Records import streamRecord
+from spinal.common.Scoreboard import Scoreboard
+from spinal.common.StreamAgents import StreamMonitor
 
 
 class ReadOnlyMasterMonitor(Infrastructure):
-    def __init__(self,name,parent,axi,dut):
+    def __init__(self,name,parent,axi,dut,coverage = None):
         Infrastructure.__init__(self,name,parent)
         self.axi = axi
         self.dut = dut
+        self.masterName = name
+        self.coverage = coverage
         self.readRspCounter = 0
-        self.readRspScoreboard = ScorboardOutOfOrder("readRspScoreboard", self)
+        self.readPending = 0
+        if coverage:
+            coverage.addMaster(name, read=True, write=False)
+        self.readRspScoreboard = Scoreboard("readRspScoreboard", self, maxOutstanding=1024)
 
     def createInfrastructure(self):
+        self.readRspRecord = streamRecord(self.axi.r, "Axi4ReadRsp", ("hid", "data", "resp", "last"))
         StreamMonitor(self.axi.ar, self.onReadCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.r, self.onReadRsp, self.dut.clk, self.dut.reset)
 
     def onReadCmd(self,cmd):
+        self.readPending += 1
+        if self.coverage:
+            self.coverage.sampleCmd(self.masterName, "read", cmd)
+            self.coverage.sampleDepth(self.masterName, "read", self.readPending)
+        rsps = []
         for i in range(cmd.len + 1):
-            rsp = Transaction()
-            rsp.hid = cmd.hid
+            rsp = self.readRspRecord(hid = cmd.hid)
             if cmd.addr < (1 << 14):
                 rsp.data = cmd.addr + i
                 rsp.resp = 0
@@ -28,7 +38,8 @@ class ReadOnlyMasterMonitor(Infrastructure):
                 rsp.resp = 3
 
             rsp.last = 1 if i == cmd.len else 0
-            self.readRspScoreboard.refPush(rsp, cmd.hid)
+            rsps.append(rsp)
+        self.readRspScoreboard.refPushBurst(rsps, cmd.hid)
 
     def onReadRsp(self,rsp):
         if rsp.resp == 3:
@@ -36,48 +47,58 @@ class ReadOnlyMasterMonitor(Infrastructure):
         self.readRspScoreboard.uutPush(rsp,rsp.hid)
         if rsp.last == 1:
             self.readRspCounter += 1
+            self.readPending -= 1
 
+    # With a coverage, the CoverageGoal decides when the stimulus can stop
     def canPhaseProgress(self, phase):
-        return self.readRspCounter > 50
+        return self.coverage is not None or self.readRspCounter > 50
 
 
 
 class WriteOnlyMasterMonitor(Infrastructure):
-    def __init__(self,name,parent,axi,dut):
+    def __init__(self,name,parent,axi,dut,coverage = None):
         Infrastructure.__init__(self,name,parent)
         self.axi = axi
         self.dut = dut
+        self.masterName = name
+        self.coverage = coverage
         self.writeRspCounter = 0
-        self.writeRspScoreboard = ScorboardOutOfOrder("writeRspScoreboard", self)
+        self.writePending = 0
+        if coverage:
+            coverage.addMaster(name, read=False, write=True)
+        self.writeRspScoreboard = Scoreboard("writeRspScoreboard", self, maxOutstanding=256)
 
     def createInfrastructure(self):
+        self.writeRspRecord = streamRecord(self.axi.b, "Axi4WriteRsp", ("hid", "resp"))
         StreamMonitor(self.axi.aw, self.onWriteCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.b, self.onWriteRsp, self.dut.clk, self.dut.reset)
 
     def onWriteCmd(self,cmd):
-        rsp = Transaction()
-        rsp.hid = cmd.hid
-        if cmd.addr < (1 << 14):
-            rsp.resp = 0
-        else:
-            rsp.resp = 3
+        self.writePending += 1
+        if self.coverage:
+            self.coverage.sampleCmd(self.masterName, "write", cmd)
+            self.coverage.sampleDepth(self.masterName, "write", self.writePending)
+        rsp = self.writeRspRecord(hid = cmd.hid, resp = 0 if cmd.addr < (1 << 14) else 3)
 
         self.writeRspScoreboard.refPush(rsp, cmd.hid)
 
     def onWriteRsp(self,rsp):
         self.writeRspScoreboard.uutPush(rsp,rsp.hid)
         self.writeRspCounter += 1
+        self.writePending -= 1
 
     def canPhaseProgress(self, phase):
-        return self.writeRspCounter > 50
+        return self.coverage is not None or self.writeRspCounter > 50
 
 
 class SharedMasterMonitor(ReadOnlyMasterMonitor,WriteOnlyMasterMonitor):
-    def __init__(self,name,parent,axi,dut):
-        ReadOnlyMasterMonitor.__init__(self,name,parent,axi,dut)
-        WriteOnlyMasterMonitor.__init__(self,name,parent,axi,dut)
+    def __init__(self,name,parent,axi,dut,coverage = None):
+        ReadOnlyMasterMonitor.__init__(self,name,parent,axi,dut,coverage)
+        WriteOnlyMasterMonitor.__init__(self,name,parent,axi,dut,coverage)
 
     def createInfrastructure(self):
+        self.readRspRecord = streamRecord(self.axi.r, "Axi4ReadRsp", ("hid", "data", "resp", "last"))
+        self.writeRspRecord = streamRecord(self.axi.b, "Axi4WriteRsp", ("hid", "resp"))
         StreamMonitor(self.axi.arw, self.onSharedCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.b, self.onWriteRsp, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.r, self.onReadRsp, self.dut.clk, self.dut.reset)
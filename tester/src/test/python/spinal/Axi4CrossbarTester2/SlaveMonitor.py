@@ -1,7 +1,7 @@
 from cocotblib.Phase import Infrastructure
-from cocotblib.Scorboard import ScorboardInOrder
-
-from cocotblib.Stream import Transaction, StreamMonitor
+from spinal.common.Records import streamRecord
+from spinal.common.Scoreboard import Scoreboard
+from spinal.common.StreamAgents import StreamMonitor
 
 
 class WriteDataMonitor(Infrastructure):
@@ -9,19 +9,21 @@ class WriteDataMonitor(Infrastructure):
         Infrastructure.__init__(self,name,parent)
         self.axi = axi
         self.dut = dut
-        self.dataScoreboard = ScorboardInOrder("scoreboard", self)
+        self.dataScoreboard = Scoreboard("scoreboard", self, maxOutstanding=1024)
 
     def createInfrastructure(self):
+        self.writeDataRecord = streamRecord(self.axi.w, "Axi4WriteData", ("data", "strb", "last"))
         StreamMonitor(self.axi.aw, self.onWriteCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.w, self.onWriteData, self.dut.clk, self.dut.reset)
 
     def onWriteCmd(self,cmd):
+        writeDatas = []
         for i in range(cmd.len + 1):
-            writeData = Transaction()
-            writeData.data = cmd.addr + i
-            writeData.strb = (cmd.addr + i) & 0xF
-            writeData.last = 1 if i == cmd.len else 0
-            self.dataScoreboard.refPush(writeData)
+            writeDatas.append(self.writeDataRecord(
+                data = cmd.addr + i,
+                strb = (cmd.addr + i) & 0xF,
+                last = 1 if i == cmd.len else 0))
+        self.dataScoreboard.refPushBurst(writeDatas)
 
     def onWriteData(self,trans):
         self.dataScoreboard.uutPush(trans)
@@ -32,6 +34,7 @@ class SharedDataMonitor(WriteDataMonitor):
         WriteDataMonitor.__init__(self,name,parent,axi,dut)
 
     def createInfrastructure(self):
+        self.writeDataRecord = streamRecord(self.axi.w, "Axi4WriteData", ("data", "strb", "last"))
         StreamMonitor(self.axi.arw, self.onSharedCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.w, self.onWriteData, self.dut.clk, self.dut.reset)
 
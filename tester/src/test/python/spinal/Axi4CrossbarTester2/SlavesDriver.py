@@ -1,69 +1,62 @@
-import random
-from queue import Queue
-
 from cocotb.result import TestFailure
+from cocotblib.Phase import Infrastructure
 from cocotblib.misc import BoolRandomizer
 
-from cocotblib.Stream import StreamDriverSlave, StreamDriverMaster, Transaction, StreamMonitor
+from spinal.common.IdQueues import IdQueues
+from spinal.common.Records import streamRecord
+from spinal.common.WriteReconciler import WriteBurstAssembler
+from spinal.common.StreamAgents import StreamDriverSlave, StreamDriverMaster, StreamMonitor
 
 
-class ReadOnlySlaveDriver:
-    def __init__(self,axi,base,size,dut):
+class ReadOnlySlaveDriver(Infrastructure):
+    def __init__(self,axi,base,size,dut,name = None,parent = None):
+        Infrastructure.__init__(self,name,parent)
         self.axi = axi
         self.size = size
         self.base = base
         self.dut = dut
         self.readRspRand = BoolRandomizer()
-        self.readRspQueues = [Queue() for i in range(256)]
-        self.nonEmptyReadRspQueues = []
+        self.readRspQueues = IdQueues()
+        self.readRspDriver = None
+        self.readRspRecord = streamRecord(axi.r, "Axi4ReadRsp", ("data", "resp", "hid", "last"))
         axi.r.payload.hid <= 0
 
     def createInfrastructure(self):
         StreamDriverSlave(self.axi.ar, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.ar, self.onReadCmd, self.dut.clk, self.dut.reset)
-        StreamDriverMaster(self.axi.r, self.genReadRsp, self.dut.clk, self.dut.reset)
+        self.readRspDriver = StreamDriverMaster(self.axi.r, self.genReadRsp, self.dut.clk, self.dut.reset)
         return self
 
     def onReadCmd(self,trans):
         if trans.addr < self.base or trans.addr >= self.base + self.size:
             raise TestFailure("WRONG ADDRESS addr=%d base=%d size=%d" %(trans.addr,self.base,self.size))
         for i in range(trans.len+1):
-            rsp = Transaction()
-            rsp.data = trans.addr + i
-            rsp.resp = 0
-            rsp.hid = trans.hid
-            if i == trans.len:
-                rsp.last = 1
-            else:
-                rsp.last = 0
-            queue = self.readRspQueues[trans.hid]
-            if queue.empty():
-                self.nonEmptyReadRspQueues.append(queue)
-            queue.put(rsp)
+            rsp = self.readRspRecord(data = trans.addr + i, resp = 0, hid = trans.hid, last = 1 if i == trans.len else 0)
+            self.readRspQueues.put(trans.hid, rsp)
+
 
+    def isQuiescent(self):
+        return self.readRspQueues.empty() and not (self.readRspDriver and self.readRspDriver.valid)
 
     def genReadRsp(self):
-        if len(self.nonEmptyReadRspQueues) == 0:
+        if self.readRspQueues.empty():
             return None
         if not self.readRspRand.get():
             return None
-        queue = random.choice(self.nonEmptyReadRspQueues)
-        trans = queue.get()
-        if queue.empty():
-            self.nonEmptyReadRspQueues.remove(queue)
-        return trans
-
-class WriteOnlySlaveDriver:
-    def __init__(self,axi,base,size,dut):
+        return self.readRspQueues.get(self.readRspQueues.randomId())
+
+class WriteOnlySlaveDriver(Infrastructure):
+    def __init__(self,axi,base,size,dut,name = None,parent = None):
+        Infrastructure.__init__(self,name,parent)
         self.axi = axi
         self.size = size
         self.base = base
         self.dut = dut
         self.writeRspRand = BoolRandomizer()
-        self.writeCmds = []
-        self.writeDatas = []
-        self.writeRspQueues = [Queue() for i in range(256)]
-        self.nonEmptyWriteRspQueues = []
+        self.writes = WriteBurstAssembler()
+        self.writeRspQueues = IdQueues()
+        self.writeRspDriver = None
+        self.writeRspRecord = streamRecord(axi.b, "Axi4WriteRsp", ("hid", "resp"))
         axi.b.payload.hid <= 0
 
     def createInfrastructure(self):
@@ -71,66 +64,57 @@ class WriteOnlySlaveDriver:
         StreamDriverSlave(self.axi.w, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.aw, self.onWriteCmd, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.w, self.onWriteData, self.dut.clk, self.dut.reset)
-        StreamDriverMaster(self.axi.b, self.genWriteRsp, self.dut.clk, self.dut.reset)
+        self.writeRspDriver = StreamDriverMaster(self.axi.b, self.genWriteRsp, self.dut.clk, self.dut.reset)
         return self
 
     def onWriteCmd(self,trans):
         if trans.addr < self.base or trans.addr >= self.base + self.size:
             raise TestFailure("WRONG ADDRESS addr=%d base=%d size=%d" %(trans.addr,self.base,self.size))
-        self.writeCmds.append(trans)
+        self.writes.addCmd(trans)
         self.managePendingWrites()
 
     def onWriteData(self, trans):
-        self.writeDatas.append(trans)
+        self.writes.addData(trans)
         self.managePendingWrites()
 
     def managePendingWrites(self):
-        if len(self.writeCmds) != 0:
-            cmd = self.writeCmds[0]
-            beatCount = cmd.len + 1
-            if len(self.writeDatas) >= beatCount:
-                datas = self.writeDatas[0:beatCount - 1]
-
-                # Clean
-                self.writeCmds = self.writeCmds[1:]
-                self.writeDatas = self.writeDatas[beatCount:]
-
-                # Rsp
-                rsp = Transaction()
-                rsp.hid = cmd.hid
-                rsp.resp = 0
-
-                queue = self.writeRspQueues[cmd.hid]
-                if queue.empty():
-                    self.nonEmptyWriteRspQueues.append(queue)
-                queue.put(rsp)
+        burst = self.writes.pop()
+        if burst:
+            cmd, datas = burst
+
+            # Rsp
+            rsp = self.writeRspRecord(hid = cmd.hid, resp = 0)
+
+            self.writeRspQueues.put(cmd.hid, rsp)
+
+    def isQuiescent(self):
+        return self.writes.empty() and self.writeRspQueues.empty() and not (self.writeRspDriver and self.writeRspDriver.valid)
 
     def genWriteRsp(self):
-        if len(self.nonEmptyWriteRspQueues) == 0:
+        if self.writeRspQueues.empty():
             return None
         if not self.writeRspRand.get():
             return None
-        queue = random.choice(self.nonEmptyWriteRspQueues)
-        trans = queue.get()
-        if queue.empty():
-            self.nonEmptyWriteRspQueues.remove(queue)
-        return trans
+        return self.writeRspQueues.get(self.writeRspQueues.randomId())
 
 class SharedSlaveDriver(WriteOnlySlaveDriver, ReadOnlySlaveDriver):
-    def __init__(self,axi,base,size,dut):
-        WriteOnlySlaveDriver.__init__(self, axi,base,size, dut)
-        ReadOnlySlaveDriver.__init__(self, axi,base,size, dut)
+    def __init__(self,axi,base,size,dut,name = None,parent = None):
+        WriteOnlySlaveDriver.__init__(self, axi,base,size, dut, name, parent)
+        ReadOnlySlaveDriver.__init__(self, axi,base,size, dut, name, parent)
+
+    def isQuiescent(self):
+        return WriteOnlySlaveDriver.isQuiescent(self) and ReadOnlySlaveDriver.isQuiescent(self)
 
 
     def createInfrastructure(self):
         StreamMonitor(self.axi.arw, self.onSharedCmd, self.dut.clk, self.dut.reset)
         StreamDriverSlave(self.axi.arw, self.dut.clk, self.dut.reset)
 
-        StreamDriverMaster(self.axi.r, self.genReadRsp, self.dut.clk, self.dut.reset)
+        self.readRspDriver = StreamDriverMaster(self.axi.r, self.genReadRsp, self.dut.clk, self.dut.reset)
 
         StreamDriverSlave(self.axi.w, self.dut.clk, self.dut.reset)
         StreamMonitor(self.axi.w, self.onWriteData, self.dut.clk, self.dut.reset)
-        StreamDriverMaster(self.axi.b, self.genWriteRsp, self.dut.clk, self.dut.reset)
+        self.writeRspDriver = StreamDriverMaster(self.axi.b, self.genWriteRsp, self.dut.clk, self.dut.reset)
         return self
 
     def onSharedCmd(self,trans):
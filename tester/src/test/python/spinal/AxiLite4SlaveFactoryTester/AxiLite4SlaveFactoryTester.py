@@ -1,11 +1,11 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb.result import TestFailure
 from cocotb.triggers import RisingEdge
 
 from cocotblib.misc import randSignal, assertEquals, truncUInt, ClockDomainAsyncReset
+from spinal.common.Fifo import Fifo
 
 
 class UutModel:
@@ -13,7 +13,7 @@ class UutModel:
         self.dut = dut
         self.regA = 44
         self.regB = 44
-        self.readAddresses = Queue()
+        self.readAddresses = Fifo()
         cocotb.fork(self.loop())
 
     @cocotb.coroutine
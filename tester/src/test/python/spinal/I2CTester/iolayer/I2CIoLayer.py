@@ -1,7 +1,11 @@
+from collections import deque
+
 import cocotb
-from cocotb.triggers import RisingEdge, FallingEdge, Event
+from cocotb.result import TestFailure
+from cocotb.triggers import Edge, Event
+from cocotb.utils import get_sim_time
 
-from cocotblib.misc import assertEquals, randInt
+from cocotblib.misc import randInt
 
 
 ###############################################################################
@@ -12,26 +16,35 @@ class I2CConfig:
 
 ###############################################################################
 # I2C - Analyse data passing on the i2c bus
+# With dataWidth=None each sampled bit is given as a BIT event (bit level
+# sequences made of WRITE_BIT/READ_BIT), else bits are grouped in DATA + ACK/NACK
 #
 class I2CIoLayerAnalyser:
 
-    def __init__(self, helperSlave, listOperation):
-
-        self.sda = helperSlave.io.sda_rd
-        self.scl = helperSlave.io.scl_rd
-        self.clk = helperSlave.io.clk
+    def __init__(self, sda, scl, listOperation=None, dataWidth=I2CConfig.dataWdith):
 
-        self.event_RisingEdge  = Event()
-        self.event_FallingEdge  = Event()
+        self.sda = sda
+        self.scl = scl
+        self.dataWidth = dataWidth
 
         self.event_Start = Event()
         self.event_Stop  = Event()
 
-        self.listOp = list()
-        self.refListOp = listOperation
-        self.dataBinRead = list()
+        self.listeners = list()
+        self.checker = None
+
+        self.inFrame = False
+        self.bitCounter = 0
+        self.bitPosition = 0
+        self.data = 0
+
+        if listOperation is not None:
+            self.checker = I2CSequenceChecker(listOperation)
+            self.addListener(self.checker.check)
 
-        self.startSeq = 0
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
 
 
     #==========================================================================
@@ -39,135 +52,125 @@ class I2CIoLayerAnalyser:
     #==========================================================================
     @cocotb.coroutine
     def start(self):
-
-        self.fork_falling = cocotb.fork(self._FallingEdgeDetection())
-        self.fork_rising  = cocotb.fork(self._RisingEdgeDetection())
-        self.fork_start   = cocotb.fork(self._startDetection())
-        self.fork_stop    = cocotb.fork(self._stopDetection())
-        yield self._analyser()
+        self.fork_analyser = cocotb.fork(self._analyser())
+        yield self.fork_analyser.join()
 
 
     #==========================================================================
     # Stop all processes
     #==========================================================================
     def stop(self):
-        self.fork_falling.kill()
-        self.fork_rising.kill()
-        self.fork_start.kill()
-        self.fork_stop.kill()
+        self.fork_analyser.kill()
 
 
     #==========================================================================
-    # Store all event appening on the bus
+    # Only wake up on sda/scl edges, START/STOP are sda changes while scl is
+    # high and bits are sampled on the scl rising edge. A bit is only given on
+    # the scl falling edge, the scl high before a STOP or a repeated START
+    # isn't a bit
+    # X/Z values (before the reset) keep the last resolved state, which starts
+    # with the bus released
     #==========================================================================
     @cocotb.coroutine
     def _analyser(self):
-
-        self.listOp = list()
-
-        # Start ---------------------------------------------------------------
-        yield self.event_Start.wait()
-        yield RisingEdge(self.clk)
-        self.startSeq = 0
+        sdaEdge = Edge(self.sda)
+        sclEdge = Edge(self.scl)
+        sda = self._read(self.sda, 1)
+        scl = self._read(self.scl, 1)
+        sample = None
 
         while True:
+            yield [sdaEdge, sclEdge]
+            newSda = self._read(self.sda, sda)
+            newScl = self._read(self.scl, scl)
 
-            dataBinRead = list()
-            index = 0
-            # Read data -----------------------------------------------------------
-            while index < I2CConfig.dataWdith:
-                yield self.event_RisingEdge.wait()
-                dataBinRead.append(int(self.sda))
-                #print("data ", index, " value " , int(self.sda), "index ", index, "start " , self.startSeq )
+            if scl == 1 and newScl == 1 and newSda != sda:
+                sample = None
+                if newSda == 0:
+                    self.event_Start.set()
+                    self.inFrame = True
+                    self.bitCounter = 0
+                    self.data = 0
+                    self._emit(START())
+                else:
+                    self.event_Stop.set()
+                    self.inFrame = False
+                    self._emit(STOP())
+            elif scl == 0 and newScl == 1 and self.inFrame:
+                sample = newSda
+            elif scl == 1 and newScl == 0 and sample is not None:
+                self.bitPosition += 1
+                self._onBit(sample)
+                sample = None
+
+            sda = newSda
+            scl = newScl
+
+
+    def _read(self, pin, last):
+        value = pin.value
+        return int(value) if value.is_resolvable else last
+
+
+    def _onBit(self, value):
+        if self.dataWidth is None:
+            self._emit(BIT(value))
+        elif self.bitCounter < self.dataWidth:
+            self.data = (self.data << 1) | value
+            self.bitCounter += 1
+            if self.bitCounter == self.dataWidth:
+                self._emit(DATA(self.data))
+        else:
+            self._emit(ACK() if value == 0 else NACK())
+            self.bitCounter = 0
+            self.data = 0
 
-                if self.startSeq == 1:
-                    index = 0
-                    self.startSeq = 0
-                    dataBinRead = list()
-                    dataBinRead.append(int(self.sda))
 
-                index += 1
+    def _emit(self, op):
+        op.bitPosition = self.bitPosition
+        op.time = get_sim_time("ns")
+        for listener in self.listeners:
+            listener(op)
 
-            dataInRead = int("".join([str(x) for x in dataBinRead]), 2)
-            self.listOp.append(DATA(dataInRead))
 
-            # Read ACK ------------------------------------------------------------
-            yield self.event_RisingEdge.wait()
-            if int(self.sda) == 0:
-                self.listOp.append(ACK())
-            else:
-                self.listOp.append(NACK())
 
-            #print()
+###############################################################################
+# I2C - Compare the decoded events one by one with the expected operations
+# Matched operations are dropped, so the memory doesn't grow with the test
+#
+class I2CSequenceChecker:
 
-    #==========================================================================
-    # Detect the start condition
-    #==========================================================================
-    @cocotb.coroutine
-    def _startDetection(self):
-        yield RisingEdge(self.clk)
-        while True:
-            prev = int(self.sda)
-            yield RisingEdge(self.clk)
-            if prev == 1 and int(self.sda) == 0:
-                if int(self.scl) == 1:
-                    self.event_Start.set()
-                    self.listOp.append(START())
-                    self.startSeq = 1
+    def __init__(self, listOperation):
+        self.expected = deque(listOperation)
+        self.matchCounter = 0
 
 
-    #==========================================================================
-    # Detect the stop condition
-    #==========================================================================
-    @cocotb.coroutine
-    def _stopDetection(self):
-        yield RisingEdge(self.clk)
-        while True:
-            prev = int(self.sda)
-            yield RisingEdge(self.clk)
-            if prev == 0 and int(self.sda) == 1:
-                if int(self.scl) == 1:
-                    self.event_Stop.set()
-                    self.listOp.append(STOP())
+    def check(self, op):
+        if not self.expected:
+            self._fail(op, "no more operation expected")
+        ref = self.expected.popleft()
 
-                    # check sequence...
-                    for (op, ref) in zip(self.listOp, self.refListOp):
+        if isinstance(op, BIT):
+            if not isinstance(ref, (WRITE_BIT, READ_BIT)):
+                self._fail(op, "expected %s" % (str(ref).rstrip(" -")))
+            if ref.data != op.data:
+                self._fail(op, "expected %s, bit differs" % (str(ref).rstrip(" -")))
+        elif isinstance(op, DATA):
+            if not isinstance(ref, (WRITE, READ)):
+                self._fail(op, "expected %s" % (str(ref).rstrip(" -")))
+            if ref.data != op.data:
+                self._fail(op, "expected %s, data differs (xor %02X)" % (str(ref).rstrip(" -"), ref.data ^ op.data))
+        elif type(ref) is not type(op):
+            self._fail(op, "expected %s" % (str(ref).rstrip(" -")))
+        self.matchCounter += 1
 
-                        if isinstance(ref, START) and isinstance(op, START):
-                            pass
-                        elif isinstance(ref, STOP) and isinstance(op, STOP):
-                            pass
-                        elif isinstance(ref, ACK) and isinstance(op, ACK):
-                            pass
-                        elif isinstance(ref, NACK) and isinstance(op, NACK):
-                            pass
-                        elif (isinstance(ref, WRITE) or isinstance(ref, READ)) and isinstance(op, DATA):
-                            if ref.data != op.data:
-                                print(("ref ", hex(ref.data), " op ", hex(op.data)))
-                                assertEquals(ref.data , op.data , "Analyser data ERROR")
 
-                        else:
-                            assertEquals(True , False , "%s is not equal to %s" % (ref, op))
+    def _fail(self, op, reason):
+        raise TestFailure("I2C analyser : got %s at bit %d (%d ns) after %d matched operations, %s" % (str(op).rstrip(" -"), op.bitPosition, op.time, self.matchCounter, reason))
 
 
-    #==========================================================================
-    # Detect a Rising edge of scl
-    #==========================================================================
-    @cocotb.coroutine
-    def _RisingEdgeDetection(self):
-        while True:
-            yield RisingEdge(self.scl)
-            self.event_RisingEdge.set()
-
-
-    #==========================================================================
-    # Detect a Falling edge of scl
-    #==========================================================================
-    @cocotb.coroutine
-    def _FallingEdgeDetection(self):
-        while True:
-            yield FallingEdge(self.scl)
-            self.event_FallingEdge.set()
+    def isDone(self):
+        return not self.expected
 
 
 
@@ -209,3 +212,50 @@ class STOP(I2COperation):
     def __repr__(self):
         return "STOP"
 
+
+class WRITE(I2COperation):
+    def __init__(self, data=-1):
+        if data == -1 :
+            self.data = randInt(0,255)
+        else:
+            self.data = data
+
+    def __repr__(self):
+        return "Write %02X - " % (self.data)
+
+
+class READ(I2COperation):
+    def __init__(self, data=-1):
+        if data == -1 :
+            self.data = randInt(0,255)
+        else:
+            self.data = data
+
+    def __repr__(self):
+        return "Read %02X - " % (self.data)
+
+
+###############################################################################
+# I2C - Events decoded by the analyser
+#
+class DATA(I2COperation):
+    def __init__(self, data):
+        self.data = data
+
+    def __repr__(self):
+        return "Data %02X - " % (self.data)
+
+class BIT(I2COperation):
+    def __init__(self, data):
+        self.data = data
+
+    def __repr__(self):
+        return "Bit %d - " % (self.data)
+
+class ACK(I2COperation):
+    def __repr__(self):
+        return "Ack - "
+
+class NACK(I2COperation):
+    def __repr__(self):
+        return "Nack - "
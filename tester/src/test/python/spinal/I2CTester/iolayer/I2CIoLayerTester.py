@@ -2,6 +2,7 @@
 # Test for the I2C  Io layer
 #
 ###############################################################################
+from cocotb.result import TestFailure
 from cocotb.triggers import Timer
 
 from cocotblib.ClockDomain import ClockDomain, RESET_ACTIVE_LEVEL
@@ -10,6 +11,40 @@ from spinal.I2CTester.iolayer.I2CMasterIoLayer import I2CMasterIoLayer
 from spinal.I2CTester.iolayer.I2CSlaveIoLayer  import I2CSlaveIoLayer
 
 
+###############################################################################
+# Execute one sequence on the bus, the analyser decoding io_sda/io_scl meanwhile
+@cocotb.coroutine
+def runSequence(dut, operationSeq, analyser):
+
+    helperMaster = I2CMasterIoLayer(dut)
+    helperSlave  = I2CSlaveIoLayer(dut)
+
+    clockDomain = ClockDomain(dut.clk, 500, dut.resetn, RESET_ACTIVE_LEVEL.LOW)
+    cocotb.fork(clockDomain.start())
+
+    # Init IO and wait the end of the reset
+    helperMaster.io.init()
+    helperSlave.io.init()
+    yield clockDomain.event_endReset.wait()
+
+
+    cocotb.fork(analyser.start())
+    cocotb.fork(helperMaster.execOperations(operationSeq))
+    #cocotb.fork(helperMaster.checkResponse(operationSeq))
+    cocotb.fork(helperSlave.execOperations(operationSeq))
+    #yield helperSlave.checkResponse(operationSeq)
+
+    yield Timer(500000)
+
+    # Stop all processes
+    clockDomain.stop()
+    helperSlave.stop()
+    helperMaster.stop()
+    analyser.stop()
+
+    yield Timer(250000)
+
+
 ###############################################################################
 # Test (Scenario 1)
 @cocotb.test()
@@ -19,8 +54,6 @@ def test_scenario(dut):
     from cocotblib.misc import cocotbXHack
     cocotbXHack()
 
-    delay = 300000
-
     listOperation = list()
 
     listOperation.append( [START(), WRITE_BIT(0), WRITE_BIT(1), WRITE_BIT(0), STOP()] )
@@ -29,37 +62,54 @@ def test_scenario(dut):
     listOperation.append( [START(), READ_BIT(0), START(), WRITE_BIT(0), STOP()] )
 
 
-
     for operationSeq in listOperation:
 
-        helperMaster = I2CMasterIoLayer(dut)
-        helperSlave  = I2CSlaveIoLayer(dut)
-        #analyser     = I2CHALAnalyser(helperMaster, operationSeq)
+        # Bit level decoding, one BIT event per WRITE_BIT/READ_BIT
+        analyser = I2CIoLayerAnalyser(dut.io_sda, dut.io_scl, operationSeq, dataWidth=None)
 
-        clockDomain = ClockDomain(dut.clk, 500, dut.resetn, RESET_ACTIVE_LEVEL.LOW)
-        cocotb.fork(clockDomain.start())
+        yield runSequence(dut, operationSeq, analyser)
 
-        # Init IO and wait the end of the reset
-        helperMaster.io.init()
-        helperSlave.io.init()
-        yield clockDomain.event_endReset.wait()
+        if not analyser.checker.isDone():
+            raise TestFailure("I2C analyser : %d operations never seen on the bus" % (len(analyser.checker.expected)))
 
 
-        #cocotb.fork(analyser.start())
-        cocotb.fork(helperMaster.execOperations(operationSeq))
-        #cocotb.fork(helperMaster.checkResponse(operationSeq))
-        cocotb.fork(helperSlave.execOperations(operationSeq))
-        #yield helperSlave.checkResponse(operationSeq)
-
-        yield Timer(500000)
+    dut.log.info("Cocotb I2C Io Layer - Basic test")
 
-        # Stop all processes
-        clockDomain.stop()
-        helperSlave.stop()
-        helperMaster.stop()
-       # analyser.stop()
 
-        yield Timer(250000)
+###############################################################################
+# Test (Checker) : the bus carries another bit than the expected one, the
+# checker must stop on this first divergence and report its bit and time
+@cocotb.test()
+def test_checkerDivergence(dut):
 
+    dut.log.info("Cocotb I2C IO Layer - Checker divergence test")
+    from cocotblib.misc import cocotbXHack
+    cocotbXHack()
 
-    dut.log.info("Cocotb I2C Io Layer - Basic test")
+    operationSeq = [START(), WRITE_BIT(0), WRITE_BIT(1), WRITE_BIT(0), STOP()]
+    expectedSeq  = [START(), WRITE_BIT(0), WRITE_BIT(0), WRITE_BIT(0), STOP()]
+
+    analyser = I2CIoLayerAnalyser(dut.io_sda, dut.io_scl, dataWidth=None)
+    checker  = I2CSequenceChecker(expectedSeq)
+
+    # Keep the failure instead of letting it kill the analyser
+    failures = list()
+    def checkUntilFailure(op):
+        if not failures:
+            try:
+                checker.check(op)
+            except TestFailure as error:
+                failures.append((op, str(error)))
+    analyser.addListener(checkUntilFailure)
+
+    yield runSequence(dut, operationSeq, analyser)
+
+    if len(failures) != 1:
+        raise TestFailure("I2C checker : the divergence wasn't detected")
+    op, message = failures[0]
+    if not isinstance(op, BIT) or op.bitPosition != 2 or checker.matchCounter != 2:
+        raise TestFailure("I2C checker : wrong divergence reported, %s" % (message))
+    if ("at bit 2 (%d ns)" % (op.time)) not in message:
+        raise TestFailure("I2C checker : bit position/time missing from the report, %s" % (message))
+
+    dut.log.info("Cocotb I2C Io Layer - Checker divergence test")
@@ -1,4 +1,4 @@
-from cocotb.triggers import Timer
+from cocotb.triggers import Timer, RisingEdge
 from cocotblib.Stream import Stream
 from cocotblib.Flow import Flow
 
@@ -1,4 +1,4 @@
-from cocotb.triggers import Timer
+from cocotb.triggers import Timer, RisingEdge
 
 from cocotblib.misc   import assertEquals
 from cocotblib.Stream import Stream
@@ -1,65 +1,10 @@
-from cocotb import fork
 from cocotb.decorators import coroutine
-from cocotb.triggers import Timer, Edge, RisingEdge
+from cocotb.triggers import Timer, RisingEdge
 
 from cocotblib.misc import clockedWaitTrue, testBit
+from spinal.common.OpenDrain import OpenDrainSoftConnection, OpenDrainInterconnect
 
-
-class OpenDrainSoftConnection:
-    def __init__(self, interconnect):
-        self.interconnect = interconnect
-        self._value = True
-
-    def write(self,value):
-        if self._value != value:
-            self._value = value
-            self.interconnect.evaluate()
-
-    def read(self):
-        return self.interconnect.value
-
-class OpenDrainInterconnect:
-
-    def __init__(self,applyChange = None):
-        self.applyChange = applyChange
-        self.softConnections = []
-        self.hardWriters = []
-        self.hardReaders = []
-        self.value = True
-
-    def newSoftConnection(self):
-        endpoint = OpenDrainSoftConnection(self)
-        self.softConnections.append(endpoint)
-        return endpoint
-
-    @coroutine
-    def pinWatcher(self,driver):
-        while True:
-            yield Edge(driver)
-            self.evaluate()
-
-    def addHardDriver(self,driver):
-        self.hardWriters.append(driver)
-        fork(self.pinWatcher(driver))
-
-    def addHardReader(self,reader):
-        self.hardReaders.append(reader)
-        reader <= self.value
-
-    def evaluate(self):
-        newValue = True
-        for soft in self.softConnections:
-            newValue &= soft._value
-
-        for hard in self.hardWriters:
-            newValue &= (int(hard) == 1)
-
-        if newValue != self.value:
-            self.value = newValue
-            for reader in self.hardReaders:
-                reader <= newValue
-            if self.applyChange:
-                self.applyChange(newValue)
+__all__ = ["OpenDrainSoftConnection", "OpenDrainInterconnect", "I2cSoftMaster"]
 
 
 class I2cSoftMaster:
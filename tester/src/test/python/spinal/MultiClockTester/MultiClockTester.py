@@ -1,9 +1,9 @@
-from queue import Queue
 
 import cocotb
 from cocotb.triggers import Timer, RisingEdge
 
 from cocotblib.misc import randSignal, assertEquals, BoolRandomizer
+from spinal.common.Fifo import Fifo
 
 
 class Packet:
@@ -73,7 +73,7 @@ def test1(dut):
     cocotbXHack()
     #random.seed(0)
 
-    queue = Queue()
+    queue = Fifo()
 
     cocotb.fork(clockProcess(dut))
     cocotb.fork(cmd(dut,queue))
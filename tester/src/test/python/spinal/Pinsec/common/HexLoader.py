@@ -1,6 +1,10 @@
+import struct
+
 import cocotb
 from cocotb.triggers import Timer
 
+from spinal.common.ImageLoader import loadImage
+
 
 @cocotb.coroutine
 def loadIHexCallback(address,array,dut,clk):
@@ -44,8 +48,43 @@ def loadIHexCallback(address,array,dut,clk):
             address += 1
 
 
+# Byte masked Mem are emitted as one array per byte lane (ram_symbol0..3) by SpinalHDL, else as a single word array
+def onChipRamArrays(ram):
+    try:
+        return [ram.ram]
+    except AttributeError:
+        return [getattr(ram, "ram_symbol%d" % i) for i in range(4)]
+
+
+def memoryOf(address):
+    return "ram" if address < 0x40000000 else "sdram"
+
+
+# Write the memory arrays directly through the simulator handles, without advancing the simulation
+def loadBackdoor(address,array,dut):
+    assert(address & 3 == 0)
+    assert(len(array) & 3 == 0)
+    if memoryOf(address) == "ram":
+        arrays = onChipRamArrays(dut.uut.axi_ram)
+        base = address >> 2
+        if len(arrays) == 1:
+            ram = arrays[0]
+            for i, word in enumerate(struct.unpack_from("<%dI" % (len(array) // 4), array)):
+                ram[base + i].setimmediatevalue(word)
+        else:
+            for lane, symbols in enumerate(arrays):
+                for i, byte in enumerate(array[lane::4]):
+                    symbols[base + i].setimmediatevalue(byte)
+    else:
+        banks = [dut.sdram.Bank0, dut.sdram.Bank1, dut.sdram.Bank2, dut.sdram.Bank3]
+        for i, half in enumerate(struct.unpack_from("<%dH" % (len(array) // 2), array)):
+            halfAddress = address + i * 2
+            bank = banks[(halfAddress >> (1+10)) & 0x3]
+            bank[((halfAddress >> 1) & 0x3FF) + (((halfAddress >> (1+10+2)) & 0x1FFF) << 10)].setimmediatevalue(half)
+
+
 @cocotb.coroutine
-def loadIHex(dut,hexPath,clk,reset):
+def loadIHex(dut,hexPath,clk,reset,backdoor = True):
 
     reset <= 1
     clk <= 0
@@ -64,23 +103,18 @@ def loadIHex(dut,hexPath,clk,reset):
 
 
     # readIHex(hexPath,loadIHexCallback,dut)
-    with open(hexPath) as f:
-        offset = 0
-        for line in f:
-            if len(line) > 0:
-                assert line[0] == ':'
-                byteCount = int(line[1:3], 16)
-                nextAddr = int(line[3:7], 16) + offset
-                key = int(line[7:9], 16)
-                if key == 0:
-                    array = [int(line[9 + i * 2:11 + i * 2], 16) for i in range(0, byteCount)]
-                    yield loadIHexCallback(nextAddr,array,dut,clk)
-                elif key == 2:
-                    offset = int(line[9:13], 16) << 4
-                elif key == 4:
-                    offset = int(line[9:13], 16) << 16
-                else:
-                    pass
+    # The backdoor fallback is decided per memory, the on-chip RAM and the SDRAM model don't expose the same handles
+    backdoors = {"ram" : backdoor, "sdram" : backdoor}
+    for segment in loadImage(hexPath):
+        memory = memoryOf(segment.address)
+        if backdoors[memory]:
+            try:
+                loadBackdoor(segment.address,segment.data,dut)
+                continue
+            except (AttributeError, IndexError, TypeError) as error:
+                dut.log.warning("Backdoor load of the %s not supported (%s: %s), fallback to the memory ports" % (memory, type(error).__name__, error))
+                backdoors[memory] = False
+        yield loadIHexCallback(segment.address,segment.data,dut,clk)
     reset <= 0
     yield Timer(5)
     reset <= 1
@@ -1,20 +1,15 @@
 import random
 
 import cocotb
-from cocotb.triggers import Timer, Edge
+from cocotb.triggers import Timer
 
 from cocotblib.misc import simulationSpeedPrinter
+from spinal.common.Bridge import bridge
 from spinal.Pinsec.common.CoreCom import readCoreValueAssert
 from spinal.Pinsec.common.HexLoader import loadIHex
 from spinal.Pinsec.common.Misc import pinsecClockGen
 
 
-@cocotb.coroutine
-def txToRxBypass(dut):
-    while True:
-        dut.io_uart_rxd <= int(dut.io_uart_txd)
-        yield Edge(dut.io_uart_txd)
-
 @cocotb.coroutine
 def assertions(dut):
     yield readCoreValueAssert(dut,16, "A")
@@ -47,6 +42,6 @@ def test1(dut):
     cocotb.fork(simulationSpeedPrinter(uut.io_axiClk))
     yield loadIHex(dut,"../hex/uart.hex",uut.io_axiClk,uut.io_asyncReset)
     pinsecClockGen(dut)
-    cocotb.fork(txToRxBypass(uut))
+    bridge(uut.io_uart_txd, uut.io_uart_rxd)
 
     yield assertions(uut)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# Run the RiscvTester ISA suite sharded over several simulator processes
+#   python -m spinal.RiscvTester.IsaRunner cached -j 32
+import argparse
+import heapq
+import json
+import operator
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+
+from spinal.RiscvTester.IsaTests import isaTestsBase, isaTestsMemory, isaTestsMulDiv
+
+suiteDirs = {
+    "cached"   : "cached",
+    "uncached" : "uncached"
+}
+
+
+def loadDurations(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# Longest known test first, always on the least loaded shard. Each shard is then put back in suite order, as the
+# tester filters the suite lists and TestFactory numbers the testcases in that order
+def balanceShards(tests, durations, shardCount):
+    known = [durations[t] for t in tests if t in durations]
+    default = sum(known) / len(known) if known else 1.0
+    ordered = sorted(tests, key=lambda t: durations.get(t, default), reverse=True)
+    shardCount = max(1, min(shardCount, len(tests)))
+    loads = [(0.0, i) for i in range(shardCount)]
+    shards = [[] for i in range(shardCount)]
+    for test in ordered:
+        load, i = heapq.heappop(loads)
+        shards[i].append(test)
+        heapq.heappush(loads, (load + durations.get(test, default), i))
+    order = dict((test, i) for i, test in enumerate(tests))
+    return [sorted(shard, key=order.get) for shard in shards if shard]
+
+
+def findResults(shardDir):
+    for path in [shardDir + "/results.xml", shardDir + "/sim_build/results.xml"]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def runShard(testDir, shardDir, tests, lang, make):
+    os.makedirs(shardDir, exist_ok=True)
+    resultsPath = shardDir + "/results.xml"
+    if os.path.exists(resultsPath):
+        os.remove(resultsPath)
+    env = dict(os.environ)
+    env["RISCV_ISA_TESTS"] = ",".join(tests)
+    env["COCOTB_RESULTS_FILE"] = resultsPath
+    # Each shard runs from its own directory so log.txt, waves and other cwd outputs don't collide. -I lets make
+    # resolve the test Makefile relative includes, PYTHONPATH keeps the test module importable from there
+    pythonPath = os.path.realpath(testDir + "/../../..") + os.pathsep + testDir
+    startAt = time.time()
+    with open(shardDir + "/sim.log", "w") as log:
+        subprocess.call([make, "-f", testDir + "/Makefile", "-I", testDir, "TOPLEVEL_LANG=" + lang, "SIM_BUILD=" + shardDir + "/sim_build", "PYTHONPATH=" + pythonPath],
+                        stdout=log, stderr=subprocess.STDOUT, env=env, cwd=shardDir)
+    return tests, findResults(shardDir), time.time() - startAt
+
+
+def testSuffix(testcase):
+    name = testcase.get("name", "")
+    suffix = name.rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+# TestFactory numbers its tests in the order of the iHexPath option, which is the suite order balanceShards keeps,
+# so the n-th testcase is the n-th hex of the shard
+def mergeResults(shardResults, outPath, durations):
+    merged = ET.Element("testsuites", name="results")
+    suite = ET.SubElement(merged, "testsuite", name="RiscvTesterIsa", package="all")
+    failures = 0
+    for tests, resultsPath, wallTime in shardResults:
+        testcases = []
+        if resultsPath:
+            testcases = sorted(ET.parse(resultsPath).getroot().iter("testcase"), key=testSuffix)
+        for i, test in enumerate(tests):
+            if i < len(testcases):
+                testcase = testcases[i]
+                testcase.set("name", "testIsa_" + test)
+                if "time" in testcase.attrib:
+                    durations[test] = float(testcase.get("time"))
+            else:
+                testcase = ET.Element("testcase", name="testIsa_" + test, classname="RiscvTesterIsa")
+                ET.SubElement(testcase, "failure", message="No result reported by the shard")
+            if testcase.find("failure") is not None or testcase.find("error") is not None:
+                failures += 1
+            suite.append(testcase)
+    ET.ElementTree(merged).write(outPath)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded RiscvTester ISA regression")
+    parser.add_argument("suite", choices=sorted(suiteDirs.keys()))
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--lang", default="verilog")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--make", default="make")
+    args = parser.parse_args()
+
+    testDir = os.path.dirname(os.path.realpath(__file__)) + "/" + suiteDirs[args.suite]
+    outDir = os.path.abspath(args.out if args.out else testDir + "/isa_runs")
+    os.makedirs(outDir, exist_ok=True)
+    durationsPath = outDir + "/durations.json"
+
+    tests = [os.path.basename(path) for path in reduce(operator.add, [isaTestsBase, isaTestsMemory, isaTestsMulDiv])]
+    durations = loadDurations(durationsPath)
+    shards = balanceShards(tests, durations, args.jobs)
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(runShard, testDir, outDir + "/shard_" + str(i), shard, args.lang, args.make) for i, shard in enumerate(shards)]
+        shardResults = [future.result() for future in futures]
+
+    failures = mergeResults(shardResults, outDir + "/results.xml", durations)
+    with open(durationsPath, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+
+    wallTime = max(result[2] for result in shardResults)
+    print("ISA %s : %d tests on %d shards in %.1f s, FAIL=%d" % (args.suite, len(tests), len(shards), wallTime, failures))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
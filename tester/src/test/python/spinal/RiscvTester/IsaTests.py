@@ -0,0 +1,61 @@
+import os
+testLocation = os.path.dirname(os.path.realpath(__file__)) + "/tests/"
+
+isaTestsBase =  [testLocation + "rv32ui-pt-add.hex",
+                 testLocation + "rv32ui-pt-addi.hex",
+                 testLocation + "rv32ui-pt-and.hex",
+                 testLocation + "rv32ui-pt-andi.hex",
+                 testLocation + "rv32ui-pt-auipc.hex",
+                 testLocation + "rv32ui-pt-beq.hex",
+                 testLocation + "rv32ui-pt-bge.hex",
+                 testLocation + "rv32ui-pt-bgeu.hex",
+                 testLocation + "rv32ui-pt-blt.hex",
+                 testLocation + "rv32ui-pt-bltu.hex",
+                 testLocation + "rv32ui-pt-bne.hex",
+                 testLocation + "rv32ui-pt-j.hex",
+                 testLocation + "rv32ui-pt-jal.hex",
+                 testLocation + "rv32ui-pt-jalr.hex",
+                 testLocation + "rv32ui-pt-or.hex",
+                 testLocation + "rv32ui-pt-ori.hex",
+                 testLocation + "rv32ui-pt-simple.hex",
+                 testLocation + "rv32ui-pt-sll.hex",
+                 testLocation + "rv32ui-pt-slli.hex",
+                 testLocation + "rv32ui-pt-slt.hex",
+                 testLocation + "rv32ui-pt-slti.hex",
+                 testLocation + "rv32ui-pt-sra.hex",
+                 testLocation + "rv32ui-pt-srai.hex",
+                 testLocation + "rv32ui-pt-srl.hex",
+                 testLocation + "rv32ui-pt-srli.hex",
+                 testLocation + "rv32ui-pt-sub.hex",
+                 testLocation + "rv32ui-pt-xor.hex",
+                 testLocation + "rv32ui-pt-xori.hex"]
+
+
+isaTestsMemory = [testLocation + "rv32ui-pt-lb.hex",
+                  testLocation + "rv32ui-pt-lbu.hex",
+                  testLocation + "rv32ui-pt-lh.hex",
+                  testLocation + "rv32ui-pt-lhu.hex",
+                  testLocation + "rv32ui-pt-lui.hex",
+                  testLocation + "rv32ui-pt-lw.hex",
+                  testLocation + "rv32ui-pt-sb.hex",
+                  testLocation + "rv32ui-pt-sh.hex",
+                  testLocation + "rv32ui-pt-sw.hex"]
+
+
+isaTestsMulDiv = [testLocation + "rv32ui-pt-mul.hex",
+                  testLocation + "rv32ui-pt-mulh.hex",
+                  testLocation + "rv32ui-pt-mulhsu.hex",
+                  testLocation + "rv32ui-pt-mulhu.hex",
+                  testLocation + "rv32ui-pt-div.hex",
+                  testLocation + "rv32ui-pt-divu.hex",
+                  testLocation + "rv32ui-pt-rem.hex",
+                  testLocation + "rv32ui-pt-remu.hex"]
+
+
+# Comma separated list of hex file names, used by IsaRunner to shard the suite
+def selectIsaTests(tests):
+    selection = os.getenv("RISCV_ISA_TESTS")
+    if not selection:
+        return tests
+    names = set(selection.split(","))
+    return [test for test in tests if os.path.basename(test) in names]
@@ -2,11 +2,13 @@ import random
 
 import cocotb
 from cocotb.triggers import Timer
-from cocotblib.Phase import PhaseManager, Infrastructure, PHASE_WAIT_TASKS_END
-from cocotblib.Scorboard import ScorboardInOrder
-from cocotblib.misc import simulationSpeedPrinter, randBits, BoolRandomizer
+from cocotblib.Phase import Infrastructure, PHASE_WAIT_TASKS_END
+from cocotblib.misc import simulationSpeedPrinter, BoolRandomizer
 
 from cocotblib.Stream import StreamDriverSlave, StreamDriverMaster, Transaction, StreamMonitor, Stream
+from spinal.common.Phase import PhaseManager
+from spinal.common.Scoreboard import Scoreboard
+from spinal.common.StimulusPool import StimulusPool
 
 
 class SdramTester(Infrastructure):
@@ -17,10 +19,11 @@ class SdramTester(Infrastructure):
         self.cmdRandomizer = BoolRandomizer()
         self.writeRandomizer = BoolRandomizer()
         self.burstRandomizer = BoolRandomizer()
+        self.pool = StimulusPool()
         self.lastAddr = 0
         self.closeIt = False
         self.ram = bytearray(b'\x00' * (1 << (9+2+2+1)))
-        self.scorboard = ScorboardInOrder("scoreboard", self)
+        self.scorboard = Scoreboard("scoreboard", self, maxOutstanding=256)
         StreamDriverSlave(rsp, clk, reset)
         # rsp.ready <= 1
         StreamMonitor(rsp, self.scorboard.uutPush, clk, reset)
@@ -40,15 +43,15 @@ class SdramTester(Infrastructure):
         trans = Transaction()
 
         if not self.burstRandomizer.get():
-            trans.address = randBits(9+2+2)
+            trans.address = self.pool.bits(9+2+2)
         else:
             trans.address = self.lastAddr + 1
             trans.address = trans.address & ((1 << 13)-1)
 
         trans.write = self.writeRandomizer.get() and self.writeRandomizer.get()
-        trans.mask = randBits(2)
-        trans.data = randBits(16)
-        trans.context = randBits(8)
+        trans.mask = self.pool.bits(2)
+        trans.data = self.pool.bits(16)
+        trans.context = self.pool.bits(8)
 
         self.lastAddr = trans.address
 
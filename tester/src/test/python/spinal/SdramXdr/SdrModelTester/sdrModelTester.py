@@ -2,7 +2,6 @@ import random
 import cocotb
 from cocotb.triggers import Timer
 
-from Verilog_VCD.Verilog_VCD import parse_vcd
 from spinal.SdramXdr.common.VcdLib import *
 
 
@@ -12,12 +11,9 @@ def test1(dut):
     from cocotblib.misc import cocotbXHack
     cocotbXHack()
 
-    forks = []
-    def map(component, net, apply, delay = 0):
-        forks.append(cocotb.fork(stim(wave, component, net, apply, delay)))
-
-    wave = parse_vcd("../../../../../../../simWorkspace/SdramXdrCtrlPlusRtlPhy/test.vcd")
+    wave = openVcd("../../../../../../../simWorkspace/SdramXdrCtrlPlusRtlPhy/test.vcd")
     top = "TOP"
+    replay = VcdReplay(wave)
 
     yield Timer(0)
     phaseCount = getLastValue(wave, top, "phaseCount")
@@ -25,14 +21,13 @@ def test1(dut):
 
     cocotb.fork(genClock(dut.Clk, None, clockPeriod//phaseCount))
 
-    list(map(top, "ADDR", lambda v : dut.Addr <= v))
-    list(map(top, "BA", lambda v : dut.Ba <= v))
-    list(map(top, "CASn", lambda v : dut.Cas_n <= v))
-    list(map(top, "CKE", lambda v : dut.Cke <= v))
-    list(map(top, "CSn", lambda v : dut.Cs_n <= v))
-    list(map(top, "RASn", lambda v : dut.Ras_n <= v))
-    list(map(top, "WEn", lambda v : dut.We_n <= v))
+    replay.add(top, "ADDR", lambda v : dut.Addr <= v)
+    replay.add(top, "BA", lambda v : dut.Ba <= v)
+    replay.add(top, "CASn", lambda v : dut.Cas_n <= v)
+    replay.add(top, "CKE", lambda v : dut.Cke <= v)
+    replay.add(top, "CSn", lambda v : dut.Cs_n <= v)
+    replay.add(top, "RASn", lambda v : dut.Ras_n <= v)
+    replay.add(top, "WEn", lambda v : dut.We_n <= v)
 
 
-    for fork in forks:
-        yield fork
+    yield replay.run()
@@ -1,38 +1,95 @@
-from queue import Queue
+from collections import deque
 
-import random
+import time
+import cocotb
+from cocotb.triggers import RisingEdge
+from cocotb.utils import get_sim_time
 from cocotblib.Stream import Stream, StreamDriverMaster, StreamMonitor, Transaction, StreamDriverSlave
-from cocotblib.misc import BoolRandomizer, randBits
+from cocotblib.misc import BoolRandomizer
 from cocotb.result import TestFailure, TestSuccess
+from spinal.common.Fifo import Fifo
+from spinal.common.StimulusPool import StimulusPool
 
 class Bmb:
     def __init__(self,dut,name):
         self.cmd = Stream(dut, name + "_cmd")
         self.rsp = Stream(dut, name + "_rsp")
 
+# Byte mask (8 bits) to bit mask (64 bits) expansion
+_maskExpand = [sum(0xFF << (i * 8) for i in range(8) if (mask >> i) & 1) for mask in range(256)]
+
+def expandMask(mask, size):
+    bitMask = 0
+    for i in range(0, size, 8):
+        bitMask |= _maskExpand[(mask >> i) & 0xFF] << (i * 8)
+    return bitMask
+
 class Memory:
     def __init__(self, size):
         self.ram = bytearray(size)
 
     def read(self, address, size):
-        data = 0
-        trigger = False
-        for i in range(size):
-            data |= self.ram[address + i] << i*8
-        if trigger:
-            print(hex(data))
-        return data
-
+        return int.from_bytes(self.ram[address:address + size], "little")
 
     def write(self, address, size, data, mask):
-        for i in range(size):
-            if mask & 1:
-                self.ram[address + i] = data & 0xFF
-            mask >>= 1
-            data >>= 8
+        fullMask = (1 << size) - 1
+        mask &= fullMask
+        if mask == fullMask:
+            self.ram[address:address + size] = (data & ((1 << (size * 8)) - 1)).to_bytes(size, "little")
+        elif mask != 0:
+            bitMask = expandMask(mask, size)
+            old = int.from_bytes(self.ram[address:address + size], "little")
+            self.ram[address:address + size] = ((old & ~bitMask) | (data & bitMask)).to_bytes(size, "little")
+
+    def readBurst(self, address, bytePerBeat, beatCount):
+        return [self.read(address + beat * bytePerBeat, bytePerBeat) for beat in range(beatCount)]
+
+    def writeBurst(self, address, bytePerBeat, datas, masks):
+        for beat, (data, mask) in enumerate(zip(datas, masks)):
+            self.write(address + beat * bytePerBeat, bytePerBeat, data, mask)
+
+VERBOSITY_QUIET   = 0
+VERBOSITY_SAMPLED = 1
+VERBOSITY_ALL     = 2
+
+class BmbRunConfig:
+    def __init__(self, transactionBudget = 10000, timeBudget = None, verbosity = VERBOSITY_SAMPLED, logPeriod = 1000):
+        self.transactionBudget = transactionBudget # Completed transactions per port
+        self.timeBudget = timeBudget               # Wall clock seconds, None for no limit
+        self.verbosity = verbosity
+        self.logPeriod = logPeriod                 # Commands between two logs in VERBOSITY_SAMPLED
+
+    def doLog(self, counter):
+        if self.verbosity == VERBOSITY_ALL:
+            return True
+        return self.verbosity == VERBOSITY_SAMPLED and counter % self.logPeriod == 0
+
+class BmbPortStats:
+    def __init__(self):
+        self.cmdCounter = 0
+        self.transactions = 0
+        self.bytes = 0
+        self.pending = deque() # (sim time, length) of the transactions waiting for their last rsp
+        self.latencies = []
+
+    def onCmd(self, length):
+        self.cmdCounter += 1
+        self.pending.append((get_sim_time("ns"), length))
+
+    def onDone(self):
+        startAt, length = self.pending.popleft()
+        self.transactions += 1
+        self.bytes += length
+        self.latencies.append(get_sim_time("ns") - startAt)
+
+    def latencyPercentile(self, percent):
+        if not self.latencies:
+            return 0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
 
 class BmbMemoryTester:
-    def __init__(self, bmbs, addressRange, lengthMin, lengthMaxAll, clk, reset, doWriteInit = False):
+    def __init__(self, bmbs, addressRange, lengthMin, lengthMaxAll, clk, reset, doWriteInit = False, config = None):
         self.run = False
         self.hold = len(bmbs)
         self.ram = Memory(addressRange)
@@ -40,32 +97,75 @@ class BmbMemoryTester:
         self.progress = [0 for x in bmbs]
         self.doWriteInit = doWriteInit
         self.writeInitAddress = 0
+        self.config = config if config else BmbRunConfig()
+        self.stats = [BmbPortStats() for x in bmbs]
+        self.clockPeriod = None
+        self.wallStart = None
+        self.simStart = None
 
+        cocotb.fork(self.measureClock(clk))
         for bmbId,bmb in enumerate(bmbs):
             self.initPort( bmbId,bmb, addressRange, lengthMin, lengthMaxAll, clk, reset)
 
+    @cocotb.coroutine
+    def measureClock(self, clk):
+        yield RisingEdge(clk)
+        startAt = get_sim_time("ns")
+        yield RisingEdge(clk)
+        self.clockPeriod = get_sim_time("ns") - startAt
+
+    def startMeasure(self):
+        if self.wallStart is None:
+            self.wallStart = time.time()
+            self.simStart = get_sim_time("ns")
+
+    def isTimeBudgetExceeded(self):
+        return self.config.timeBudget is not None and self.wallStart is not None and time.time() - self.wallStart > self.config.timeBudget
+
+    def report(self):
+        wallTime = max(time.time() - (self.wallStart if self.wallStart else time.time()), 1e-9)
+        simTime = max(get_sim_time("ns") - (self.simStart if self.simStart else 0), 1e-9)
+        cycles = simTime / self.clockPeriod if self.clockPeriod else 0
+        lines = ["BmbMemoryTester report : %.1f s wall, %.0f ns simulated, %.0f cycles/s" % (wallTime, simTime, cycles / wallTime)]
+        for bmbId, stats in enumerate(self.stats):
+            lines.append("  port %d : %d transactions, %d bytes, %.1f transactions/s, %.1f bytes/s wall, %.3f bytes/ns simulated, latency p50=%.0f p90=%.0f p99=%.0f ns" % (
+                bmbId, stats.transactions, stats.bytes, stats.transactions / wallTime, stats.bytes / wallTime, stats.bytes / simTime,
+                stats.latencyPercentile(50), stats.latencyPercentile(90), stats.latencyPercentile(99)))
+        cocotb.log.info("\n".join(lines))
+
+    def finish(self):
+        self.report()
+        raise TestSuccess()
+
 
     def initPort(self, bmbId, bmb, addressRange, lengthMin, lengthMaxAll, clk, reset):
         lengthMax = min(1 << len(bmb.cmd.payload.fragment_length), lengthMaxAll)
         doCmdRand = BoolRandomizer()
         doCmdRand.probLow = 0.1
         doCmdRand.probHigh = 0.5
-        cmdTasks = Queue()
-        rspTasks = Queue()
-        bytePerBeat = len(bmb.cmd.payload.fragment_data) / 8
+        cmdTasks = Fifo()
+        rspTasks = Fifo()
+        bytePerBeat = len(bmb.cmd.payload.fragment_data) // 8
+        stats = self.stats[bmbId]
+        pool = StimulusPool()
+        contextWidth = len(bmb.cmd.payload.fragment_context)
+        dataWidth = len(bmb.cmd.payload.fragment_data)
+        maskWidth = len(bmb.cmd.payload.fragment_mask)
 
         def genNewCmd():
-            length = random.randint(1, (lengthMax // lengthMin)) * lengthMin
+            length = pool.randint(1, (lengthMax // lengthMin)) * lengthMin
             if self.doWriteInit:
                 address = self.writeInitAddress
                 self.writeInitAddress += length
             else:
-                address = (random.randint(0, addressRange // lengthMaxAll // len(self.bmbs)-1)*len(self.bmbs) + bmbId) * lengthMaxAll
-            write = random.random() < 0.5 or self.doWriteInit
+                address = (pool.randint(0, addressRange // lengthMaxAll // len(self.bmbs)-1)*len(self.bmbs) + bmbId) * lengthMaxAll
+            write = pool.bool(0.5) or self.doWriteInit
             beatCount = (length + bytePerBeat-1) // bytePerBeat
 
-            context = randBits(len(bmb.cmd.payload.fragment_context))
-            print("* " + str(context) + " " + str(length) + " " + str(bytePerBeat) + " " + str(beatCount))
+            context = pool.bits(contextWidth)
+            stats.onCmd(length)
+            if self.config.doLog(stats.cmdCounter):
+                print("* " + str(bmbId) + " " + str(stats.cmdCounter) + " " + str(context) + " " + str(length) + " " + str(bytePerBeat) + " " + str(beatCount))
             source = 0
             if not write:
                 cmd = Transaction()
@@ -74,19 +174,19 @@ class BmbMemoryTester:
                 cmd.fragment_opcode = 0
                 cmd.fragment_address = address
                 cmd.fragment_length = length-1
-                cmd.fragment_data = randBits(len(bmb.cmd.payload.fragment_data))
-                cmd.fragment_mask = randBits(len(bmb.cmd.payload.fragment_mask))
+                cmd.fragment_data = pool.bits(dataWidth)
+                cmd.fragment_mask = pool.bits(maskWidth)
                 cmd.fragment_context = context
                 cmdTasks.put(cmd)
                 # print("***  R" + str(bmbId) + " " + hex(cmd.fragment_context))
 
-                for beat in range(beatCount):
+                for beat, data in enumerate(self.ram.readBurst(address, bytePerBeat, beatCount)):
                     rsp = Transaction()
                     rsp.last = beat == beatCount - 1
                     rsp.fragment_source = source
                     rsp.fragment_context = context
                     rsp.fragment_opcode = 0
-                    rsp.fragment_data = self.ram.read(address + beat * bytePerBeat, bytePerBeat)
+                    rsp.fragment_data = data
                     # print("***   " + str(bmbId) + " " + hex(rsp.fragment_context))
                     rspTasks.put(rsp)
             else:
@@ -99,6 +199,8 @@ class BmbMemoryTester:
                 rspTasks.put(rsp)
                 # print("***   " + str(bmbId) + " " + hex(rsp.fragment_context))
 
+                datas = []
+                masks = []
                 for beat in range(beatCount):
                     cmd = Transaction()
                     cmd.last = beat == beatCount - 1
@@ -107,15 +209,17 @@ class BmbMemoryTester:
                     cmd.fragment_length = length-1
                     cmd.fragment_source = source
                     cmd.fragment_context = context
-                    cmd.fragment_data = randBits(len(bmb.cmd.payload.fragment_data))
+                    cmd.fragment_data = pool.bits(dataWidth)
                     if self.doWriteInit:
-                        cmd.fragment_mask = (1 << len(bmb.cmd.payload.fragment_mask)) - 1
+                        cmd.fragment_mask = (1 << maskWidth) - 1
                     else:
-                        cmd.fragment_mask = randBits(len(bmb.cmd.payload.fragment_mask))
+                        cmd.fragment_mask = pool.bits(maskWidth)
                     cmdTasks.put(cmd)
                     # print("***  W " + str(bmbId) + " " + hex(cmd.fragment_context) + " " + str(length))
+                    datas.append(cmd.fragment_data)
+                    masks.append(cmd.fragment_mask)
 
-                    self.ram.write(address + beat * bytePerBeat, bytePerBeat, cmd.fragment_data, cmd.fragment_mask)
+                self.ram.writeBurst(address, bytePerBeat, datas, masks)
 
             if self.writeInitAddress >= addressRange:
                 self.writeInitAddress = False
@@ -125,6 +229,7 @@ class BmbMemoryTester:
                 while cmdTasks.empty():
                     if not self.run:
                         return None
+                    self.startMeasure()
                     genNewCmd()
                 return cmdTasks.get()
 
@@ -133,11 +238,14 @@ class BmbMemoryTester:
             assert not rspTasks.empty()
             trans.assertEqualRef(rspTasks.get())
             if trans.last:
+                stats.onDone()
                 self.progress[bmbId] += 1
-                if self.progress[bmbId] == 10000:
+                if self.progress[bmbId] == self.config.transactionBudget:
                     self.hold -= 1
                     if self.hold == 0:
-                        raise TestSuccess()
+                        self.finish()
+                if self.isTimeBudgetExceeded():
+                    self.finish()
 
         StreamDriverMaster(bmb.cmd, createCmd, clk, reset)
         StreamMonitor(bmb.rsp, checkRsp, clk, reset)
@@ -1,63 +1,88 @@
+import heapq
 import random
+from itertools import islice
+
 import cocotb
 from cocotb.triggers import Timer
 
-from Verilog_VCD.Verilog_VCD import parse_vcd
+from spinal.SdramXdr.common.VcdReader import VcdReader
+
 
+def openVcd(path):
+    return VcdReader(path)
+
+def findNet(wave, componentName, netName):
+    net = wave.find(componentName, netName)
+    if net is None:
+        raise Exception("Can't find %s.%s in %s" % (componentName, netName, wave.path))
+    return net
 
 @cocotb.coroutine
 def stim(wave, componentName, netName, apply, delay = 0):
     yield Timer(delay)
-    for netinfo in list(wave.values()):
-        for net in netinfo['nets']:
-            if net["hier"] == componentName:
-                if net["name"].startswith(netName):
-                    time = 0
-                    for t, v in netinfo['tv']:
-                        yield Timer(t-time)
-                        apply(int(v, 2))
-                        time = t
+    time = 0
+    for t, v in wave.values(findNet(wave, componentName, netName)):
+        yield Timer(t-time)
+        apply(int(v, 2))
+        time = t
+
+def _delayedChanges(wave, nets, delay, groupId):
+    for t, id, v in wave.changes(nets):
+        yield t + delay, groupId, id, v
+
+# Replay many signals from a single time ordered stream, one Timer per distinct timestamp
+class VcdReplay:
+    def __init__(self, wave):
+        self.wave = wave
+        self.groups = {}
+
+    def add(self, componentName, netName, apply, delay = 0):
+        net = findNet(self.wave, componentName, netName)
+        self.groups.setdefault(delay, {}).setdefault(net.id, (net, []))[1].append(apply)
+
+    @cocotb.coroutine
+    def run(self):
+        streams = []
+        applies = []
+        for groupId, (delay, bindings) in enumerate(sorted(self.groups.items())):
+            applies.append({id: applyList for id, (net, applyList) in bindings.items()})
+            nets = [net for net, applyList in bindings.values()]
+            streams.append(_delayedChanges(self.wave, nets, delay, groupId))
+
+        time = 0
+        for t, groupId, id, v in heapq.merge(*streams):
+            if t != time:
+                yield Timer(t - time)
+                time = t
+            value = int(v, 2)
+            for apply in applies[groupId][id]:
+                apply(value)
 
 @cocotb.coroutine
 def stimPulse(wave, componentName, netName, apply):
-    for netinfo in list(wave.values()):
-        for net in netinfo['nets']:
-            if net["hier"] == componentName:
-                if net["name"].startswith(netName):
-                    time = 0
-                    previousV = 0
-                    previousT = 0
-                    for t, v in netinfo['tv']:
-                        current = int(v, 2)
-                        if current == 0 and previousV == 1:
-                            yield Timer(previousT - time)
-                            apply(t - previousT)
-                            time = previousT
-                        previousT = t
-                        previousV = current
+    time = 0
+    previousV = 0
+    previousT = 0
+    for t, v in wave.values(findNet(wave, componentName, netName)):
+        current = int(v, 2)
+        if current == 0 and previousV == 1:
+            yield Timer(previousT - time)
+            apply(t - previousT)
+            time = previousT
+        previousT = t
+        previousV = current
 
 def getClockPeriod(wave, componentName, netName):
-    for netinfo in list(wave.values()):
-        for net in netinfo['nets']:
-            if net["hier"] == componentName:
-                if net["name"].startswith(netName):
-                    return netinfo['tv'][102][0]-netinfo['tv'][100][0]
+    changes = islice(wave.values(findNet(wave, componentName, netName)), 100, 103)
+    times = [t for t, v in changes]
+    return times[2]-times[0]
 
 def countSignal(wave, componentName, prefix, postfix):
-    count = 0
-    for netinfo in list(wave.values()):
-        for net in netinfo['nets']:
-            if net["hier"] == componentName:
-                if net["name"].startswith(prefix) and net["name"].endswith(postfix):
-                    count += 1
-    return count
+    return len(wave.findAll(componentName, prefix, postfix))
 
 def getLastValue(wave, componentName, netName):
-    for netinfo in list(wave.values()):
-        for net in netinfo['nets']:
-            if net["hier"] == componentName:
-                if net["name"].startswith(netName):
-                    return int(netinfo['tv'][0][1], 2)
+    for t, v in wave.values(findNet(wave, componentName, netName)):
+        return int(v, 2)
     raise Exception("????")
 
 @cocotb.coroutine
@@ -0,0 +1,143 @@
+from bisect import bisect_right
+
+
+class VcdNet:
+    def __init__(self, hier, name, id, size):
+        self.hier = hier
+        self.name = name
+        self.id = id
+        self.size = size
+
+    def __repr__(self):
+        return "%s.%s" % (self.hier, self.name)
+
+
+# Streaming VCD reader, only the header, per-signal counters and sparse time checkpoints are kept in memory
+class VcdReader:
+    def __init__(self, path):
+        self.path = path
+        self.timescale = None
+        self.nets = []
+        self.nameToNet = {}
+        self.hierToNets = {}
+        self.idToNets = {}
+        self.dataOffset = 0
+        self.checkpointSpacing = 1 << 20
+        self.firstOffset = None
+        self.changeCount = None
+        self.checkpointTimes = None
+        self.checkpointOffsets = None
+        self._readHeader()
+
+    def _readHeader(self):
+        scopes = []
+        offset = 0
+        with open(self.path, "rb") as f:
+            tokens = []
+            for line in f:
+                offset += len(line)
+                tokens.extend(line.split())
+                if not tokens or tokens[-1] != b"$end":
+                    continue
+                keyword = tokens[0]
+                if keyword == b"$scope":
+                    scopes.append(tokens[2].decode())
+                elif keyword == b"$upscope":
+                    scopes.pop()
+                elif keyword == b"$var":
+                    net = VcdNet(".".join(scopes), tokens[4].decode(), tokens[3].decode(), int(tokens[2]))
+                    self.nets.append(net)
+                    self.nameToNet[(net.hier, net.name)] = net
+                    self.hierToNets.setdefault(net.hier, []).append(net)
+                    self.idToNets.setdefault(net.id, []).append(net)
+                elif keyword == b"$timescale":
+                    self.timescale = b" ".join(tokens[1:-1]).decode()
+                elif keyword == b"$enddefinitions":
+                    self.dataOffset = offset
+                    tokens = []
+                    break
+                tokens = []
+
+    def find(self, hier, prefix, postfix = ""):
+        for net in self.hierToNets.get(hier, []):
+            if net.name.startswith(prefix) and net.name.endswith(postfix):
+                return net
+        return None
+
+    def findAll(self, hier, prefix, postfix = ""):
+        return [net for net in self.hierToNets.get(hier, []) if net.name.startswith(prefix) and net.name.endswith(postfix)]
+
+    # Yield (time, id, value, offset) for every change in the file, starting at the given byte offset
+    def _scan(self, offset = None, time = 0, onTime = None):
+        with open(self.path, "rb") as f:
+            f.seek(self.dataOffset if offset is None else offset)
+            position = f.tell()
+            for line in f:
+                lineOffset = position
+                position += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                head = line[0:1]
+                if head == b"#":
+                    time = int(line[1:])
+                    if onTime:
+                        onTime(time, lineOffset)
+                elif head == b"b" or head == b"B" or head == b"r" or head == b"R":
+                    value, id = line[1:].split()
+                    yield time, id, value, lineOffset
+                elif head == b"$":
+                    continue
+                else:
+                    yield time, line[1:], line[0:1], lineOffset
+
+    # One pass over the value changes recording where and when each signal first toggles and how often it toggles,
+    # plus a sparse (time, offset) checkpoint every checkpointSpacing bytes. Memory is O(signals + file / spacing)
+    def buildIndex(self):
+        if self.firstOffset is not None:
+            return
+        firstOffset = {}
+        changeCount = {}
+        checkpoints = []
+        spacing = self.checkpointSpacing
+        nextCheckpoint = [0]
+
+        def onTime(time, offset):
+            if offset >= nextCheckpoint[0]:
+                checkpoints.append((time, offset))
+                nextCheckpoint[0] = offset + spacing
+
+        for time, id, value, offset in self._scan(onTime = onTime):
+            if id in changeCount:
+                changeCount[id] += 1
+            else:
+                firstOffset[id] = (offset, time)
+                changeCount[id] = 1
+        self.firstOffset = firstOffset
+        self.changeCount = changeCount
+        self.checkpointTimes = [time for time, offset in checkpoints]
+        self.checkpointOffsets = [offset for time, offset in checkpoints]
+
+    # Lazily yield (time, id, value) for the requested nets only, from a single sequential read starting at their
+    # first change, or at the last checkpoint before startTime
+    def changes(self, nets, startTime = 0):
+        self.buildIndex()
+        ids = set(net.id.encode() for net in nets)
+        starts = [self.firstOffset[id] for id in ids if id in self.firstOffset]
+        if not starts:
+            return
+        offset, time = min(starts)
+        index = bisect_right(self.checkpointTimes, startTime) - 1
+        if index >= 0 and self.checkpointOffsets[index] > offset:
+            offset, time = self.checkpointOffsets[index], self.checkpointTimes[index]
+        for time, id, value, lineOffset in self._scan(offset, time):
+            if id in ids and time >= startTime:
+                yield time, id.decode(), value.decode()
+
+    def values(self, net, startTime = 0):
+        for time, id, value in self.changes([net], startTime):
+            yield time, value
+
+    def count(self, net):
+        self.buildIndex()
+        return self.changeCount.get(net.id.encode(), 0)
@@ -1,5 +1,4 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb import fork, log
@@ -13,6 +12,7 @@ from cocotblib.Spi import SpiMaster
 from cocotblib.Stream import Stream, StreamDriverMaster, Transaction
 from cocotblib.misc import assertEquals, randInt, ClockDomainAsyncReset, simulationSpeedPrinter, clockedWaitTrue, Bundle, randBits, randBool, SimulationTimeout, TimerClk, testBit, \
     setBit
+from spinal.common.Fifo import Fifo
 
 
 class SlaveCmdData:
@@ -248,7 +248,7 @@ def test1(dut):
 
     spi = SpiMaster(dut, "io_spi")
 
-    slaveQueue = Queue()
+    slaveQueue = Fifo()
 
     yield Timer(5000)
     yield RisingEdge(dut.clk)
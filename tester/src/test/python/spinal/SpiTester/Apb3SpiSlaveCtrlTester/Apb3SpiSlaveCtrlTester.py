@@ -1,5 +1,4 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb import fork, log
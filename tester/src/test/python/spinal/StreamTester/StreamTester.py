@@ -1,12 +1,12 @@
 import random
-from queue import Queue
 
 import cocotb
 from cocotb.result import TestFailure
 from cocotb.triggers import RisingEdge, FallingEdge
 
 from cocotblib.misc import randSignal, assertEquals, ClockDomainAsyncReset, BoolRandomizer, StreamRandomizer,StreamReader, FlowRandomizer
-from functools import reduce
+from spinal.common.Completion import CompletionCounter, AllOf
+from spinal.common.Fifo import Fifo as PayloadFifo
 
 
 class FifoPacket:
@@ -16,7 +16,7 @@ class FifoPacket:
 
 class Fifo:
     def __init__(self,dut):
-        self.queue = Queue()
+        self.queue = PayloadFifo()
         self.dut = dut
 
     @cocotb.coroutine
@@ -58,8 +58,8 @@ class Fifo:
 
 class Fork:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
-        self.counters = [0 for i in range (0,3)]
+        self.queues = [PayloadFifo() for i in range(0,3)]
+        self.counters = [CompletionCounter(1001) for i in range (0,3)]
         self.dut = dut
 
     def onInput(self,payload,handle):
@@ -68,7 +68,7 @@ class Fork:
 
     def onOutput(self,payload,portId):
         assertEquals(payload,self.queues[portId].get(),"fork error")
-        self.counters[portId] += 1
+        self.counters[portId].increment()
 
     @cocotb.coroutine
     def run(self):
@@ -76,15 +76,14 @@ class Fork:
         for idx in range(0,3):
             cocotb.fork(StreamReader("forkOutputs_" + str(idx), self.onOutput, idx, self.dut, self.dut.clk))
 
-        while not reduce(lambda x,y: x and y, [x > 1000 for x in self.counters]):
-            yield RisingEdge(self.dut.clk)
+        yield AllOf(self.counters).wait()
 
 
 
 class DispatcherInOrder:
     def __init__(self,dut):
-        self.queue = Queue()
-        self.counter = 0
+        self.queue = PayloadFifo()
+        self.counter = CompletionCounter(1000)
         self.nextPort = 0
         self.dut = dut
 
@@ -95,7 +94,7 @@ class DispatcherInOrder:
         assertEquals(payload,self.queue.get(),"DispatcherInOrder payload error")
         assertEquals(portId,self.nextPort,"DispatcherInOrder order error")
         self.nextPort = (self.nextPort + 1) % 3
-        self.counter += 1
+        self.counter.increment()
 
     @cocotb.coroutine
     def run(self):
@@ -103,8 +102,7 @@ class DispatcherInOrder:
         for idx in range(0,3):
             cocotb.fork(StreamReader("dispatcherInOrderOutputs_" + str(idx), self.onOutput, idx, self.dut, self.dut.clk))
 
-        while self.counter < 1000:
-            yield RisingEdge(self.dut.clk)
+        yield self.counter.wait()
 
 class StreamFlowArbiter:
     def __init__(self,dut):
@@ -142,8 +140,8 @@ class StreamFlowArbiter:
 
 class ArbiterInOrder:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
-        self.counter = 0
+        self.queues = [PayloadFifo() for i in range(0,3)]
+        self.counter = CompletionCounter(1000)
         self.nextPort = 0
         self.dut = dut
 
@@ -153,7 +151,7 @@ class ArbiterInOrder:
     def onOutput(self,payload,portId):
         assertEquals(payload,self.queues[self.nextPort].get(),"ArbiterInOrder payload error")
         self.nextPort = (self.nextPort + 1) % 3
-        self.counter += 1
+        self.counter.increment()
 
     @cocotb.coroutine
     def run(self):
@@ -162,14 +160,13 @@ class ArbiterInOrder:
 
         cocotb.fork(StreamReader("arbiterInOrderOutput", self.onOutput, idx, self.dut, self.dut.clk))
 
-        while self.counter < 1000:
-            yield RisingEdge(self.dut.clk)
+        yield self.counter.wait()
 
 class ArbiterLowIdPortFirst:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
+        self.queues = [PayloadFifo() for i in range(0,3)]
         self.nextPort = -1
-        self.counter = 0
+        self.counter = CompletionCounter(1000)
         self.dut = dut
 
     def onInput(self,payload,portId):
@@ -177,7 +174,7 @@ class ArbiterLowIdPortFirst:
 
     def onOutput(self,payload,dummy):
         assertEquals(payload,self.queues[self.nextPort].get(),"ArbiterLowIdPortFirst payload error")
-        self.counter += 1
+        self.counter.increment()
         self.nextPort = -1
 
     @cocotb.coroutine
@@ -200,15 +197,14 @@ class ArbiterLowIdPortFirst:
         cocotb.fork(StreamReader("arbiterLowIdPortFirstOutput", self.onOutput, idx, self.dut, self.dut.clk))
         cocotb.fork(self.arbitration())
 
-        while self.counter < 1000:
-            yield RisingEdge(dut.clk)
+        yield self.counter.wait()
 
 class ArbiterRoundRobin:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
+        self.queues = [PayloadFifo() for i in range(0,3)]
         self.nextPort = -1
         self.previousPort = 2
-        self.counter = 0
+        self.counter = CompletionCounter(1000)
         self.dut = dut
 
     def onInput(self,payload,portId):
@@ -218,7 +214,7 @@ class ArbiterRoundRobin:
         if self.queues[self.nextPort].empty():
             raise TestFailure("ArbiterRoundRobin Empty queue")
         assertEquals(payload,self.queues[self.nextPort].get(),"ArbiterRoundRobin payload error")
-        self.counter += 1
+        self.counter.increment()
         self.previousPort = self.nextPort
         self.nextPort = -1
 
@@ -247,15 +243,14 @@ class ArbiterRoundRobin:
         cocotb.fork(StreamReader("arbiterRoundRobinOutput", self.onOutput, idx, self.dut, self.dut.clk))
         cocotb.fork(self.arbitration())
 
-        while self.counter < 1000:
-            yield RisingEdge(dut.clk)
+        yield self.counter.wait()
 
 
 class ArbiterLowIdPortNoLockFirst:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
+        self.queues = [PayloadFifo() for i in range(0,3)]
         self.nextPort = -1
-        self.counter = 0
+        self.counter = CompletionCounter(1000)
         self.dut = dut
 
     def onInput(self,payload,portId):
@@ -263,7 +258,7 @@ class ArbiterLowIdPortNoLockFirst:
 
     def onOutput(self,payload,portId):
         assertEquals(payload,self.queues[self.nextPort].get(),"ArbiterLowIdPortNoLockFirst payload error")
-        self.counter += 1
+        self.counter.increment()
         self.nextPort = -1
 
 
@@ -288,15 +283,14 @@ class ArbiterLowIdPortNoLockFirst:
         cocotb.fork(StreamReader("arbiterLowIdPortFirstNoLockOutput", self.onOutput, idx, self.dut, self.dut.clk))
         cocotb.fork(self.arbitration())
 
-        while self.counter < 1000:
-            yield RisingEdge(dut.clk)
+        yield self.counter.wait()
 
 
 class ArbiterLowIdPortFragmentLockFirst:
     def __init__(self,dut):
-        self.queues = [Queue() for i in range(0,3)]
+        self.queues = [PayloadFifo() for i in range(0,3)]
         self.nextPort = -1
-        self.counter = 0
+        self.counter = CompletionCounter(1000)
         self.dut = dut
 
     def onInput(self,payload,portId):
@@ -306,7 +300,7 @@ class ArbiterLowIdPortFragmentLockFirst:
         if self.queues[self.nextPort].empty():
             raise TestFailure("ArbiterLowIdPortFragmentLockFirst Empty queue")
         assertEquals(payload.fragment,self.queues[self.nextPort].get(),"ArbiterLowIdPortFragmentLockFirst payload error")
-        self.counter += 1
+        self.counter.increment()
         if payload.last == 1:
             self.nextPort = -1
 
@@ -331,8 +325,7 @@ class ArbiterLowIdPortFragmentLockFirst:
         cocotb.fork(StreamReader("arbiterLowIdPortFirstFragmentLockOutput", self.onOutput, idx, self.dut, self.dut.clk))
         cocotb.fork(self.arbitration())
 
-        while self.counter < 1000:
-            yield RisingEdge(dut.clk)
+        yield self.counter.wait()
 
 @cocotb.test()
 def test1(dut):
@@ -1,19 +1,12 @@
 import random
-from queue import Queue
 
 import cocotb
-from cocotb.triggers import Edge, RisingEdge, FallingEdge
+from cocotb.triggers import RisingEdge
 
 from cocotblib.misc import assertEquals, ClockDomainAsyncReset, simulationSpeedPrinter
-
-UartParityType_NONE = 0
-UartParityType_EVEN = 1
-UartParityType_ODD  = 2
-
-
-UartStopType_ONE = 0
-UartStopType_TWO = 1
-
+from spinal.common.Bridge import bridge
+from spinal.common.Fifo import Fifo
+from spinal.common.Uart import UartConfigReader, UartLineMonitor, UartParityType_EVEN, UartStopType_ONE
 
 
 @cocotb.coroutine
@@ -59,44 +52,15 @@ def checkCtrlReadedBytes(dut, queue):
 
 
 
-@cocotb.coroutine
-def txToRxBypass(dut):
-    while True:
-        dut.io_uart_uart_rxd <= int(dut.io_uart_uart_txd)
-        yield Edge(dut.io_uart_uart_txd)
-
-
-@cocotb.coroutine
-def checkPin(value,cycles,pin,clk):
-    for i in range(0,cycles):
-        yield RisingEdge(clk)
-        assertEquals(value, pin, "io_uart_uart_txd")
-
 @cocotb.coroutine
 def checkTx(dut,queue):
-    dutTx = dut.io_uart_uart_txd
-    while True:
-        yield FallingEdge(dutTx)
-        baudCycles = (int(dut.io_uart_config_clockDivider)+1)*8
+    def onFrame(data):
         assert not queue.empty()
-        data = queue.get()
-        yield checkPin(0,baudCycles,dutTx,dut.clk)
-
-        if int(dut.io_uart_config_frame_parity) == UartParityType_EVEN:
-          parity = 0
-        else:
-          parity = 1
-
-        for i in range(0,int(dut.io_uart_config_frame_dataLength)+1):
-            value = (data >> i) & 1
-            parity ^= value
-            yield checkPin(value, baudCycles, dutTx, dut.clk)
-
-        if int(dut.io_uart_config_frame_parity) != UartParityType_NONE:
-            yield checkPin(parity, baudCycles, dutTx, dut.clk)
+        assertEquals(queue.get(), data, "io_uart_uart_txd")
 
-        for i in range(0, int(dut.io_uart_config_frame_stop) + 1):
-            yield checkPin(1, baudCycles, dutTx, dut.clk)
+    monitor = UartLineMonitor(dut.io_uart_uart_txd, dut.clk, UartConfigReader(dut, "io_uart_config_"), "io_uart_uart_txd")
+    monitor.addListener(onFrame)
+    yield monitor.run()
 
 
 
@@ -107,15 +71,15 @@ def test1(dut):
     from cocotblib.misc import cocotbXHack
     cocotbXHack()
 
-    queueTx = Queue()
-    queueRx = Queue()
+    queueTx = Fifo()
+    queueRx = Fifo()
 
     dut.io_uart_writeBreak <= 0
 
     cocotb.fork(ClockDomainAsyncReset(dut.clk, dut.reset))
     cocotb.fork(sendRandomPackets(dut, queueTx, queueRx))
     cocotb.fork(checkTx(dut,queueTx))
-    cocotb.fork(txToRxBypass(dut))
+    bridge(dut.io_uart_uart_txd, dut.io_uart_uart_rxd)
     cocotb.fork(simulationSpeedPrinter(dut.clk))
     yield checkCtrlReadedBytes(dut, queueRx)
 
@@ -0,0 +1,40 @@
+import os
+
+import cocotb
+from cocotb.triggers import Edge
+
+# Inputs already driven by the generated HDL harness (see HarnessGen.py and BRIDGES in Makefile.sim), as
+# "sink=source;sink=sourceA&sourceB"
+hdlBridges = {}
+for spec in os.environ.get("SPINAL_BRIDGES", "").split(";"):
+    if "=" in spec:
+        sink, sources = spec.split("=")
+        hdlBridges[sink.strip()] = set(source.strip() for source in sources.split("&"))
+
+
+def signalName(signal):
+    return getattr(signal, "_name", None)
+
+
+def isHdlBridged(sink, sources):
+    names = hdlBridges.get(signalName(sink))
+    return names is not None and names == set(signalName(source) for source in sources)
+
+
+@cocotb.coroutine
+def follow(source, sinks):
+    while True:
+        value = source.value
+        if value.is_resolvable:
+            value = int(value)
+            for sink in sinks:
+                sink <= value
+        yield Edge(source)
+
+
+# Connect source to sink. Nothing runs in Python when the harness already does it, else a coroutine copies the value
+def bridge(source, sink):
+    if isHdlBridged(sink, [source]):
+        return None
+    return cocotb.fork(follow(source, [sink]))
+
@@ -0,0 +1,81 @@
+from cocotb.triggers import Event
+
+
+# Something that becomes done once and wakes up whoever waits on it
+class Completion:
+    def __init__(self, name = None):
+        self.name = name
+        self.done = False
+        self.event = Event(name)
+        self.listeners = []
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+        if self.done:
+            listener(self)
+
+    def fire(self):
+        if self.done:
+            return
+        self.done = True
+        self.event.set()
+        for listener in self.listeners:
+            listener(self)
+
+    def wait(self):
+        return self.event.wait()
+
+
+# Done when increment() brought the value up to the threshold
+class CompletionCounter(Completion):
+    def __init__(self, threshold, name = None):
+        Completion.__init__(self, name)
+        self.threshold = threshold
+        self.value = 0
+        if threshold <= 0:
+            self.fire()
+
+    def increment(self, count = 1):
+        self.value += count
+        if self.value >= self.threshold:
+            self.fire()
+
+    def __repr__(self):
+        return "%s %d/%d" % (self.name, self.value, self.threshold)
+
+
+# Done when the predicate is true, the owner calls check() whenever the state it depends on changes
+class CompletionCondition(Completion):
+    def __init__(self, predicate, name = None):
+        Completion.__init__(self, name)
+        self.predicate = predicate
+
+    def check(self):
+        if not self.done and self.predicate():
+            self.fire()
+        return self.done
+
+
+class AllOf(Completion):
+    def __init__(self, completions, name = None):
+        Completion.__init__(self, name)
+        self.remaining = len(completions)
+        if self.remaining == 0:
+            self.fire()
+        for completion in completions:
+            completion.addListener(self.onChildDone)
+
+    def onChildDone(self, completion):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.fire()
+
+
+class AnyOf(Completion):
+    def __init__(self, completions, name = None):
+        Completion.__init__(self, name)
+        for completion in completions:
+            completion.addListener(self.onChildDone)
+
+    def onChildDone(self, completion):
+        self.fire()
@@ -0,0 +1,95 @@
+import cocotb
+from cocotb.utils import get_sim_time
+from cocotblib.Phase import Infrastructure, PHASE_CHECK_SCORBOARDS
+
+
+class CoverPoint:
+    def __init__(self, name, bins, goal = 1):
+        self.name = name
+        self.goal = goal
+        self.hits = dict((bin, 0) for bin in bins)
+        self.uncovered = set(self.hits.keys())
+
+    def addBin(self, bin):
+        if bin not in self.hits:
+            self.hits[bin] = 0
+            self.uncovered.add(bin)
+
+    def sample(self, value):
+        count = self.hits.get(value)
+        if count is None:
+            return
+        count += 1
+        self.hits[value] = count
+        if count == self.goal:
+            self.uncovered.discard(value)
+
+    def isCovered(self):
+        return not self.uncovered
+
+    def ratio(self):
+        if not self.hits:
+            return 1.0
+        return 1.0 - float(len(self.uncovered)) / len(self.hits)
+
+
+# Functional coverage as named cover points, each one a fixed set of bins with a hit goal
+class Coverage:
+    def __init__(self, name):
+        self.name = name
+        self.points = {}
+
+    def addPoint(self, name, bins, goal = 1):
+        point = CoverPoint(name, bins, goal)
+        self.points[name] = point
+        return point
+
+    def sample(self, name, value):
+        self.points[name].sample(value)
+
+    def isCovered(self):
+        for point in self.points.values():
+            if point.uncovered:
+                return False
+        return True
+
+    # Sometimes replace the value by one of the bins not hit yet, to close the coverage faster
+    def bias(self, name, pool, value, probability = 0.25):
+        point = self.points.get(name)
+        if point is not None and point.uncovered and pool.bool(probability):
+            return pool.choice(sorted(point.uncovered))
+        return value
+
+    def report(self):
+        lines = ["%s coverage" % self.name]
+        for name, point in self.points.items():
+            lines.append("  %-12s %5.1f%% %d/%d bins" % (name, point.ratio() * 100, len(point.hits) - len(point.uncovered), len(point.hits)))
+            if point.uncovered:
+                lines.append("    missing %s" % sorted(point.uncovered, key=str)[:16])
+        return "\n".join(lines)
+
+
+# Hold PHASE_SIM until the coverage is closed, or until the timeout (simulation steps, as Timer) is reached
+class CoverageGoal(Infrastructure):
+    def __init__(self, name, parent, coverage, timeout = None):
+        Infrastructure.__init__(self, name, parent)
+        self.coverage = coverage
+        self.timeout = timeout
+        self.timedOut = False
+
+    def canPhaseProgress(self, phase):
+        if not Infrastructure.canPhaseProgress(self, phase):
+            return False
+        if self.coverage.isCovered():
+            return True
+        if self.timeout is not None and get_sim_time() >= self.timeout:
+            if not self.timedOut:
+                self.timedOut = True
+                cocotb.log.warning("Coverage goal not reached before the timeout\n" + self.coverage.report())
+            return True
+        return False
+
+    def endPhase(self, phase):
+        Infrastructure.endPhase(self, phase)
+        if phase == PHASE_CHECK_SCORBOARDS:
+            cocotb.log.info(self.coverage.report())
@@ -0,0 +1,46 @@
+from collections import deque
+
+
+# Single threaded replacement of queue.Queue, cocotb coroutines never need its locks
+class Fifo:
+    def __init__(self, capacity = None):
+        self.queue = deque()
+        self.capacity = capacity
+        self.putCount = 0
+        self.getCount = 0
+        self.maxOccupancy = 0
+
+    def empty(self):
+        return not self.queue
+
+    def full(self):
+        return self.capacity is not None and len(self.queue) >= self.capacity
+
+    def put(self, item):
+        if self.capacity is not None and len(self.queue) >= self.capacity:
+            raise OverflowError("Fifo full (capacity=%d)" % self.capacity)
+        self.queue.append(item)
+        self.putCount += 1
+        if len(self.queue) > self.maxOccupancy:
+            self.maxOccupancy = len(self.queue)
+
+    def get(self):
+        if not self.queue:
+            raise IndexError("Fifo empty")
+        self.getCount += 1
+        return self.queue.popleft()
+
+    def peek(self):
+        if not self.queue:
+            raise IndexError("Fifo empty")
+        return self.queue[0]
+
+    # queue.Queue API used by the cocotblib helpers
+    put_nowait = put
+    get_nowait = get
+
+    def qsize(self):
+        return len(self.queue)
+
+    def stats(self):
+        return "puts=%d gets=%d occupancy=%d max=%d" % (self.putCount, self.getCount, len(self.queue), self.maxOccupancy)
@@ -0,0 +1,77 @@
+import re
+import sys
+
+# Generates a Verilog harness around a toplevel, with the same port names as local signals, where some inputs are
+# driven by HDL assignments instead of cocotb :
+#   python HarnessGen.py output.v top "rxd=txd" "sdaRead=sdaWriteA&sdaWriteB" -- sources.v ...
+# "a=b" copies b into a, "a=b&c" is an open drain bus (wired and). The harness module is named <top>_harness
+
+portPattern = re.compile(r"\b(input|output|inout)\s+(?:wire\s+|reg\s+|signed\s+)*(\[[^\]]+\])?\s*(\w+)")
+
+
+def findPorts(sources, top):
+    header = re.compile(r"\bmodule\s+" + re.escape(top) + r"\s*(?:#\s*\(.*?\)\s*)?\((.*?)\)\s*;", re.S)
+    for source in sources:
+        try:
+            with open(source) as file:
+                text = re.sub(r"//[^\n]*|/\*.*?\*/", "", file.read(), flags=re.S)
+        except IOError:
+            continue
+        match = header.search(text)
+        if match:
+            ports = [(direction, width or "", name) for direction, width, name in portPattern.findall(match.group(1))]
+            if ports:
+                return ports
+    return None
+
+
+def parseBridges(specs):
+    bridges = {}
+    for spec in specs:
+        sink, sources = spec.split("=")
+        bridges[sink.strip()] = [source.strip() for source in sources.split("&")]
+    return bridges
+
+
+def generate(top, ports, bridges):
+    directions = dict((name, direction) for direction, width, name in ports)
+    for sink, sources in bridges.items():
+        if directions.get(sink) != "input":
+            raise ValueError("%s is not an input of %s" % (sink, top))
+        for source in sources:
+            if source not in directions:
+                raise ValueError("%s is not a port of %s" % (source, top))
+
+    lines = ["module %s_harness;" % top]
+    for direction, width, name in ports:
+        kind = "reg " if direction == "input" and name not in bridges else "wire"
+        lines.append("  %s %s%s;" % (kind, width + " " if width else "", name))
+    for sink, sources in bridges.items():
+        lines.append("  assign %s = %s;" % (sink, " & ".join(sources)))
+    lines.append("  %s uut (" % top)
+    lines.append(",\n".join("    .%s(%s)" % (name, name) for direction, width, name in ports))
+    lines.append("  );")
+    lines.append("endmodule")
+    return "\n".join(lines) + "\n"
+
+
+def main(args):
+    split = args.index("--")
+    output, top = args[0], args[1]
+    bridges = parseBridges(args[2:split])
+    ports = findPorts(args[split + 1:], top)
+    if ports is None:
+        sys.stderr.write("HarnessGen : module %s not found\n" % top)
+        return 1
+    try:
+        text = generate(top, ports, bridges)
+    except ValueError as error:
+        sys.stderr.write("HarnessGen : %s\n" % error)
+        return 1
+    with open(output, "w") as file:
+        file.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,49 @@
+import random
+from collections import deque
+
+
+# One FIFO per transaction id, with O(1) access to a random non empty one
+class IdQueues:
+    def __init__(self):
+        self.queues = {}
+        self.nonEmptyIds = []
+        self.nonEmptyIndex = {}
+
+    def put(self, id, item):
+        queue = self.queues.get(id)
+        if queue is None:
+            queue = deque()
+            self.queues[id] = queue
+        if not queue:
+            self.nonEmptyIndex[id] = len(self.nonEmptyIds)
+            self.nonEmptyIds.append(id)
+        queue.append(item)
+
+    def peek(self, id):
+        return self.queues[id][0]
+
+    def get(self, id):
+        queue = self.queues[id]
+        item = queue.popleft()
+        if not queue:
+            # Swap remove to keep nonEmptyIds dense
+            index = self.nonEmptyIndex.pop(id)
+            lastId = self.nonEmptyIds.pop()
+            if lastId != id:
+                self.nonEmptyIds[index] = lastId
+                self.nonEmptyIndex[lastId] = index
+        return item
+
+    def randomId(self):
+        if not self.nonEmptyIds:
+            return None
+        return random.choice(self.nonEmptyIds)
+
+    def empty(self, id = None):
+        if id is None:
+            return not self.nonEmptyIds
+        queue = self.queues.get(id)
+        return not queue
+
+    def __len__(self):
+        return sum(len(self.queues[id]) for id in self.nonEmptyIds)
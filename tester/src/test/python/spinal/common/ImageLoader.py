@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import struct
+
+cacheDir = os.getenv("SPINAL_IMAGE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "spinal", "images"))
+
+
+class Segment:
+    def __init__(self, address, data):
+        self.address = address
+        self.data = data
+
+    @property
+    def end(self):
+        return self.address + len(self.data)
+
+    def __repr__(self):
+        return "Segment(0x%x, %d bytes)" % (self.address, len(self.data))
+
+
+class Image:
+    def __init__(self, segments, entry = None):
+        self.segments = segments
+        self.entry = entry
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+
+# Merge the (address, bytearray) chunks into contiguous segments
+class _SegmentBuilder:
+    def __init__(self):
+        self.chunks = []
+
+    def add(self, address, data):
+        if self.chunks and self.chunks[-1][0] + len(self.chunks[-1][1]) == address:
+            self.chunks[-1][1].extend(data)
+        else:
+            self.chunks.append((address, bytearray(data)))
+
+    def build(self):
+        self.chunks.sort(key=lambda chunk: chunk[0])
+        merged = []
+        for address, data in self.chunks:
+            if merged and merged[-1][0] + len(merged[-1][1]) == address:
+                merged[-1][1].extend(data)
+            else:
+                merged.append((address, data))
+        return merged
+
+
+def parseIHex(content):
+    builder = _SegmentBuilder()
+    entry = None
+    offset = 0
+    for line in content.decode("ascii").splitlines():
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        assert line[0] == ':'
+        record = bytes.fromhex(line[1:])
+        byteCount = record[0]
+        address = (record[1] << 8) | record[2]
+        key = record[3]
+        data = record[4:4 + byteCount]
+        if key == 0:
+            builder.add(offset + address, data)
+        elif key == 1:
+            break
+        elif key == 2:
+            offset = ((data[0] << 8) | data[1]) << 4
+        elif key == 3:
+            cs, ip = struct.unpack(">HH", data)
+            entry = (cs << 4) + ip
+        elif key == 4:
+            offset = ((data[0] << 8) | data[1]) << 16
+        elif key == 5:
+            entry = struct.unpack(">I", data)[0]
+    return builder.build(), entry
+
+
+def parseElf(content):
+    assert content[0:4] == b"\x7fELF", "Not an ELF file"
+    is64 = content[4] == 2
+    endian = "<" if content[5] == 1 else ">"
+    if is64:
+        entry, phoff = struct.unpack_from(endian + "QQ", content, 24)
+        phentsize, phnum = struct.unpack_from(endian + "HH", content, 54)
+    else:
+        entry, phoff = struct.unpack_from(endian + "II", content, 24)
+        phentsize, phnum = struct.unpack_from(endian + "HH", content, 42)
+    builder = _SegmentBuilder()
+    for i in range(phnum):
+        header = phoff + i * phentsize
+        if is64:
+            segType, flags, offset, vaddr, paddr, filesz, memsz = struct.unpack_from(endian + "IIQQQQQ", content, header)
+        else:
+            segType, offset, vaddr, paddr, filesz, memsz = struct.unpack_from(endian + "IIIIII", content, header)
+        if segType == 1 and memsz != 0:
+            builder.add(paddr, content[offset:offset + filesz] + bytes(memsz - filesz))
+    return builder.build(), entry
+
+
+def parseImage(path, content, base = 0):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".hex" or extension == ".ihex":
+        return parseIHex(content)
+    if extension == ".elf" or content[0:4] == b"\x7fELF":
+        return parseElf(content)
+    return [(base, bytearray(content))], base
+
+
+def _cachePaths(path, base):
+    key = hashlib.sha1(("%s@%x" % (os.path.realpath(path), base)).encode()).hexdigest()
+    return os.path.join(cacheDir, key + ".bin"), os.path.join(cacheDir, key + ".json")
+
+
+def _fromBlob(blob, table):
+    view = memoryview(blob)
+    segments = [Segment(address, view[offset:offset + length]) for address, offset, length in table["segments"]]
+    return Image(segments, table["entry"])
+
+
+def _writeCache(binPath, tablePath, table, segments):
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        if segments is not None:
+            with open(binPath + ".tmp", "wb") as f:
+                for address, data in segments:
+                    f.write(data)
+            os.replace(binPath + ".tmp", binPath)
+        with open(tablePath + ".tmp", "w") as f:
+            json.dump(table, f)
+        os.replace(tablePath + ".tmp", tablePath)
+    except OSError:
+        pass
+
+
+# Parse a .hex/.elf/.bin image once, then serve it from the on-disk cache while the file is unchanged
+def loadImage(path, base = 0, useCache = True):
+    stat = os.stat(path)
+    binPath, tablePath = _cachePaths(path, base)
+    table = None
+    if useCache and os.path.exists(tablePath) and os.path.exists(binPath):
+        try:
+            with open(tablePath) as f:
+                table = json.load(f)
+        except ValueError:
+            table = None
+        if table and table["mtime"] == stat.st_mtime_ns and table["size"] == stat.st_size:
+            with open(binPath, "rb") as f:
+                return _fromBlob(f.read(), table)
+
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if table and table["sha1"] == digest:
+        table["mtime"] = stat.st_mtime_ns
+        _writeCache(binPath, tablePath, table, None)
+        with open(binPath, "rb") as f:
+            return _fromBlob(f.read(), table)
+
+    segments, entry = parseImage(path, content, base)
+    entries = []
+    offset = 0
+    for address, data in segments:
+        entries.append([address, offset, len(data)])
+        offset += len(data)
+    table = {"path": os.path.realpath(path), "mtime": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest, "entry": entry, "segments": entries}
+    if useCache:
+        _writeCache(binPath, tablePath, table, segments)
+    return _fromBlob(b"".join(data for address, data in segments), table)
@@ -0,0 +1,73 @@
+import struct
+
+_formats = {1: "<B", 2: "<H", 4: "<I"}
+
+
+class MemoryRegion:
+    def __init__(self, name, base, end, size, fill = 0xFF, writable = True):
+        self.name = name
+        self.base = base
+        self.end = end
+        self.writable = writable
+        self.buffer = bytearray([fill]) * size
+        self.view = memoryview(self.buffer)
+
+    def contains(self, address):
+        return self.base <= address <= self.end
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __getitem__(self, offset):
+        return self.buffer[offset]
+
+    def __setitem__(self, offset, value):
+        self.buffer[offset] = value
+
+    def read(self, address, size = 4):
+        return struct.unpack_from(_formats[size], self.buffer, address - self.base)[0]
+
+    def write(self, address, size, data):
+        struct.pack_into(_formats[size], self.buffer, address - self.base, data & ((1 << (size * 8)) - 1))
+
+    def read8(self, address):
+        return self.buffer[address - self.base]
+
+    def read16(self, address):
+        return self.read(address, 2)
+
+    def read32(self, address):
+        return self.read(address, 4)
+
+    def load(self, address, data):
+        offset = address - self.base
+        self.view[offset:offset + len(data)] = data
+
+
+class FlatMemory:
+    def __init__(self):
+        self.regions = []
+
+    def addRegion(self, name, base, end, size, fill = 0xFF, writable = True):
+        region = MemoryRegion(name, base, end, size, fill, writable)
+        self.regions.append(region)
+        self.regions.sort(key=lambda r: r.base)
+        return region
+
+    def find(self, address):
+        for region in self.regions:
+            if region.contains(address):
+                return region
+        return None
+
+    def read(self, address, size = 4):
+        region = self.find(address)
+        if region is None:
+            raise IndexError("Memory read out of range %x" % address)
+        return region.read(address, size)
+
+    def write(self, address, size, data):
+        region = self.find(address)
+        if region is None:
+            raise IndexError("Memory write out of range %x" % address)
+        region.write(address, size, data)
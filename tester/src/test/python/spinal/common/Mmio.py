@@ -0,0 +1,70 @@
+from bisect import bisect_right
+
+
+def ignoreWrite(address, size, data):
+    pass
+
+
+class MmioDecoder:
+    def __init__(self):
+        self.readDevices = {}
+        self.writeDevices = {}
+        self.regionBases = []
+        self.regions = []
+
+    def addDevice(self, address, read = None, write = None):
+        if read:
+            self.readDevices[address] = read
+        if write:
+            self.writeDevices[address] = write
+
+    def addRegion(self, base, end, read = None, write = None):
+        index = bisect_right(self.regionBases, base)
+        if index != 0:
+            assert self.regions[index - 1][1] < base, "Overlapping MMIO region at %x" % base
+        if index != len(self.regions):
+            assert end < self.regions[index][0], "Overlapping MMIO region at %x" % base
+        self.regionBases.insert(index, base)
+        self.regions.insert(index, (base, end, read, write))
+
+    def addMemory(self, region, write = None):
+        self.addRegion(region.base, region.end, region.read, write if write else region.write)
+
+    def findRegion(self, address):
+        index = bisect_right(self.regionBases, address) - 1
+        if index >= 0:
+            region = self.regions[index]
+            if address <= region[1]:
+                return region
+        return None
+
+    def findRead(self, address):
+        device = self.readDevices.get(address)
+        if device is None:
+            region = self.findRegion(address)
+            if region:
+                device = region[2]
+        return device
+
+    def findWrite(self, address):
+        device = self.writeDevices.get(address)
+        if device is None:
+            region = self.findRegion(address)
+            if region:
+                device = region[3]
+        return device
+
+    # Return None when nothing is mapped at this address
+    def read(self, address):
+        device = self.findRead(address)
+        if device is None:
+            return None
+        return device(address)
+
+    # Return False when nothing is mapped at this address
+    def write(self, address, size, data):
+        device = self.findWrite(address)
+        if device is None:
+            return False
+        device(address, size, data)
+        return True
@@ -0,0 +1,69 @@
+from cocotb import fork
+from cocotb.decorators import coroutine
+from cocotb.triggers import Edge
+
+
+class OpenDrainSoftConnection:
+    def __init__(self, interconnect):
+        self.interconnect = interconnect
+        self._value = True
+
+    def write(self,value):
+        value = bool(value)
+        if self._value != value:
+            self._value = value
+            self.interconnect.update(-1 if value else 1)
+
+    def read(self):
+        return self.interconnect.value
+
+
+# One open drain bus (SCL, SDA, a multi-drop GPIO, ...). It keeps the number of endpoints pulling low, so a change
+# of one endpoint costs O(1) whatever the endpoint count, and readers are only written when the bus value toggles.
+# Hard drivers values are cached from the Edge which woke their watcher
+class OpenDrainInterconnect:
+
+    def __init__(self,applyChange = None):
+        self.applyChange = applyChange
+        self.softConnections = []
+        self.hardWriters = []
+        self.hardReaders = []
+        self.lowCount = 0
+        self.value = True
+
+    def newSoftConnection(self):
+        endpoint = OpenDrainSoftConnection(self)
+        self.softConnections.append(endpoint)
+        return endpoint
+
+    # X/Z values (before the reset reaches the DUT) keep the last resolved state, which starts released
+    @coroutine
+    def pinWatcher(self,driver):
+        high = True
+        while True:
+            value = driver.value
+            if value.is_resolvable:
+                value = int(value) == 1
+                if value != high:
+                    high = value
+                    self.update(-1 if value else 1)
+            yield Edge(driver)
+
+    def addHardDriver(self,driver):
+        self.hardWriters.append(driver)
+        fork(self.pinWatcher(driver))
+
+    def addHardReader(self,reader):
+        self.hardReaders.append(reader)
+        reader <= self.value
+
+    def update(self, delta):
+        self.lowCount += delta
+        newValue = self.lowCount == 0
+        if newValue != self.value:
+            self.value = newValue
+            for reader in self.hardReaders:
+                reader <= newValue
+            if self.applyChange:
+                self.applyChange(newValue)
+
@@ -0,0 +1,75 @@
+import cocotb
+from cocotb.triggers import Timer
+from cocotblib.Phase import Infrastructure, PHASE_SIM, PHASE_WAIT_TASKS_END, PHASE_CHECK_SCORBOARDS, PHASE_DONE
+
+
+def infrastructures(root):
+    stack = list(getattr(root, "children", ()))
+    while stack:
+        infra = stack.pop()
+        yield infra
+        stack.extend(getattr(infra, "children", ()))
+
+
+# Infrastructures with transactions in flight implement isQuiescent(), the others are always quiescent
+def isQuiescent(root):
+    for infra in infrastructures(root):
+        check = getattr(infra, "isQuiescent", None)
+        if check is not None and not check():
+            return False
+    return True
+
+
+# Same phases as cocotblib's PhaseManager, but PHASE_WAIT_TASKS_END ends as soon as everything is quiescent.
+# setWaitTasksEndTime only sets the timeout of that drain
+class PhaseManager(Infrastructure):
+    def __init__(self, pollPeriod = 10000, quietPolls = 2):
+        Infrastructure.__init__(self, None, None)
+        self.phase = None
+        self.waitTasksEndTime = 0
+        self.pollPeriod = pollPeriod
+        self.quietPolls = quietPolls
+        self.drainTime = None
+
+    def setWaitTasksEndTime(self, value):
+        self.waitTasksEndTime = value
+
+    def getPhase(self):
+        return self.phase
+
+    def switchPhase(self, phase):
+        if self.phase is not None:
+            self.endPhase(self.phase)
+        self.phase = phase
+        self.startPhase(phase)
+
+    @cocotb.coroutine
+    def waitChild(self):
+        while not self.canPhaseProgress(self.phase):
+            yield Timer(self.pollPeriod)
+
+    @cocotb.coroutine
+    def waitDrain(self):
+        elapsed = 0
+        quiet = 0
+        while elapsed < self.waitTasksEndTime:
+            if isQuiescent(self):
+                quiet += 1
+                if quiet >= self.quietPolls:
+                    break
+            else:
+                quiet = 0
+            yield Timer(self.pollPeriod)
+            elapsed += self.pollPeriod
+        else:
+            cocotb.log.warning("PhaseManager : drain timeout after %d" % elapsed)
+        self.drainTime = elapsed
+
+    @cocotb.coroutine
+    def run(self):
+        self.switchPhase(PHASE_SIM)
+        yield self.waitChild()
+        self.switchPhase(PHASE_WAIT_TASKS_END)
+        yield self.waitDrain()
+        self.switchPhase(PHASE_CHECK_SCORBOARDS)
+        self.switchPhase(PHASE_DONE)
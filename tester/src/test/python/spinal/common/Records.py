@@ -0,0 +1,76 @@
+from cocotb.result import TestFailure
+
+_missing = object()
+_recordClasses = {}
+
+
+# Base of the generated records, only the fields listed in __slots__ can be set
+class Record(object):
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def items(self):
+        for name in self.__slots__:
+            value = getattr(self, name, _missing)
+            if value is not _missing:
+                yield name, value
+
+    # Same view of the elements as cocotblib's Transaction, for the drivers and scoreboards
+    @property
+    def _nameToElement(self):
+        return dict(self.items())
+
+    # Like Transaction.equalRef, only the elements set in the reference are compared
+    def equalRef(self, ref):
+        if isinstance(ref, Record):
+            for name, value in ref.items():
+                if getattr(self, name, _missing) != value:
+                    return False
+            return True
+        for name, value in self.items():
+            if getattr(ref, name) != value:
+                return False
+        return True
+
+    def assertEqualRef(self, ref):
+        if not self.equalRef(ref):
+            raise TestFailure("\nFAIL transaction not equal\ntransaction =>\n%s\nref =>\n%s\n" % (self, ref))
+
+    def __eq__(self, other):
+        if type(self) is type(other):
+            for name in self.__slots__:
+                if getattr(self, name, _missing) != getattr(other, name, _missing):
+                    return False
+            return True
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, " ".join("%s=0x%x" % (name, value) if isinstance(value, int) else "%s=%s" % (name, value) for name, value in self.items()))
+
+
+def recordClass(name, fields):
+    fields = tuple(fields)
+    key = (name, fields)
+    cls = _recordClasses.get(key)
+    if cls is None:
+        cls = type(name, (Record,), {"__slots__": fields})
+        _recordClasses[key] = cls
+    return cls
+
+
+# Record class holding the payload elements of the stream, plus the extra fields the testbench attaches
+def streamRecord(stream, name, extra = ()):
+    fields = list(getattr(stream.payload, "nameToElement", {}).keys())
+    for field in extra:
+        if field not in fields:
+            fields.append(field)
+    return recordClass(name, fields)
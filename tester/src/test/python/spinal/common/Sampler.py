@@ -0,0 +1,48 @@
+import cocotb
+from cocotb.triggers import RisingEdge
+
+
+class SignalSnapshot(object):
+    __slots__ = ("_root", "_handles", "__dict__")
+
+    def __init__(self, root):
+        self._root = root
+        self._handles = {}
+
+    # Resolve the handle once, then read its value at most once per clock edge
+    def __getattr__(self, name):
+        handle = self._handles.get(name)
+        if handle is None:
+            handle = getattr(self._root, name)
+            self._handles[name] = handle
+        value = int(handle)
+        self.__dict__[name] = value
+        return value
+
+    def clear(self):
+        self.__dict__.clear()
+
+
+class EdgeSampler:
+    def __init__(self, clk, root):
+        self.clk = clk
+        self.snapshot = SignalSnapshot(root)
+        self.listeners = []
+        self.cycle = 0
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        return cocotb.fork(self.run())
+
+    @cocotb.coroutine
+    def run(self):
+        snapshot = self.snapshot
+        listeners = self.listeners
+        while True:
+            yield RisingEdge(self.clk)
+            self.cycle += 1
+            snapshot.clear()
+            for listener in listeners:
+                listener(snapshot)
@@ -0,0 +1,153 @@
+from collections import deque
+
+import cocotb
+from cocotb.result import TestFailure
+from cocotb.utils import get_sim_time
+from cocotblib.Phase import Infrastructure, PHASE_CHECK_SCORBOARDS
+
+from spinal.common.Records import Record
+
+_missing = object()
+
+
+def elementsOf(trans):
+    if isinstance(trans, Record):
+        return list(trans.items())
+    elements = getattr(trans, "_nameToElement", None)
+    if elements is None:
+        elements = dict((key, value) for key, value in vars(trans).items() if not key.startswith("_"))
+    return list(elements.items())
+
+
+# Only the elements of the reference are compared, as Transaction.equalRef does
+def matchRef(uut, ref):
+    for name, value in elementsOf(ref):
+        if getattr(uut, name, _missing) != value:
+            return False
+    return True
+
+
+def diffRef(uut, ref):
+    diffs = []
+    for name, value in elementsOf(ref):
+        uutValue = getattr(uut, name, _missing)
+        if uutValue != value:
+            diffs.append("%s: uut=%s ref=%s" % (name, "missing" if uutValue is _missing else hex(uutValue) if isinstance(uutValue, int) else uutValue, hex(value) if isinstance(value, int) else value))
+    return diffs
+
+
+# Per id FIFOs of expected transactions (refs) and observed ones (uuts), matched as soon as both sides have an entry.
+# A single id gives an in order scoreboard. Entries are (transaction, simTime) tuples in deques, so push/match are O(1)
+# maxOutstanding bounds the unmatched entries, a stuck side fails the test instead of growing the queues forever
+class Scoreboard(Infrastructure):
+    def __init__(self, name, parent, maxOutstanding = 4096, candidateCount = 3):
+        Infrastructure.__init__(self, name, parent)
+        self.refs = {}
+        self.uuts = {}
+        self.maxOutstanding = maxOutstanding
+        self.candidateCount = candidateCount
+        self.outstanding = 0
+        self.maxDepth = 0
+        self.matchCounter = 0
+        self.latencySum = 0
+        self.latencyMax = 0
+
+    def _queue(self, queues, id):
+        queue = queues.get(id)
+        if queue is None:
+            queue = deque()
+            queues[id] = queue
+        return queue
+
+    def refPush(self, ref, id = 0):
+        uuts = self.uuts.get(id)
+        now = get_sim_time("ns")
+        if uuts:
+            uut, time = uuts.popleft()
+            self.outstanding -= 1
+            self.match(uut, ref, id, time, now)
+            return
+        self._queue(self.refs, id).append((ref, now))
+        self._onPush(1)
+
+    # Push all the expected beats of a burst at once
+    def refPushBurst(self, refs, id = 0):
+        uuts = self.uuts.get(id)
+        if uuts:
+            for ref in refs:
+                self.refPush(ref, id)
+            return
+        now = get_sim_time("ns")
+        self._queue(self.refs, id).extend((ref, now) for ref in refs)
+        self._onPush(len(refs))
+
+    def uutPush(self, uut, id = 0):
+        refs = self.refs.get(id)
+        now = get_sim_time("ns")
+        if refs:
+            ref, time = refs.popleft()
+            self.outstanding -= 1
+            self.match(uut, ref, id, time, now)
+            return
+        self._queue(self.uuts, id).append((uut, now))
+        self._onPush(1)
+
+    def _onPush(self, count):
+        self.outstanding += count
+        if self.outstanding > self.maxDepth:
+            self.maxDepth = self.outstanding
+        if self.maxOutstanding is not None and self.outstanding > self.maxOutstanding:
+            raise TestFailure("%s has %d unmatched transactions, more than the %d allowed" % (self.path(), self.outstanding, self.maxOutstanding))
+
+    def match(self, uut, ref, id, pushTime, now):
+        if not matchRef(uut, ref):
+            raise TestFailure(self.mismatchReport(uut, ref, id))
+        latency = now - pushTime
+        self.matchCounter += 1
+        self.latencySum += latency
+        if latency > self.latencyMax:
+            self.latencyMax = latency
+
+    # Expected head of the id first, then the pending refs closest to the uut
+    def mismatchReport(self, uut, ref, id):
+        lines = ["%s mismatch on id %s at %d ns" % (self.path(), id, get_sim_time("ns")), "uut => %s" % uut, "ref => %s" % ref]
+        lines.extend("  " + diff for diff in diffRef(uut, ref))
+        candidates = []
+        for refId, queue in self.refs.items():
+            for index, (candidate, time) in enumerate(queue):
+                if index >= 16:
+                    break
+                elements = elementsOf(candidate)
+                score = sum(1 for name, value in elements if getattr(uut, name, _missing) == value) - len(elements)
+                candidates.append((score, refId, index, candidate))
+        candidates.sort(key=lambda entry: -entry[0])
+        for score, refId, index, candidate in candidates[:self.candidateCount]:
+            lines.append("candidate id=%s position=%d => %s" % (refId, index, candidate))
+            lines.extend("  " + diff for diff in diffRef(uut, candidate))
+        return "\n".join(lines)
+
+    # The PhaseManager root has no name
+    def path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.name:
+                names.append(str(node.name))
+            node = getattr(node, "parent", None)
+        return "/".join(reversed(names))
+
+    def isQuiescent(self):
+        return self.outstanding == 0
+
+    def stats(self):
+        average = self.latencySum / self.matchCounter if self.matchCounter else 0
+        return "%s : matched=%d pending=%d maxDepth=%d latency avg=%.1f ns max=%d ns" % (self.path(), self.matchCounter, self.outstanding, self.maxDepth, average, self.latencyMax)
+
+    def endPhase(self, phase):
+        Infrastructure.endPhase(self, phase)
+        if phase == PHASE_CHECK_SCORBOARDS:
+            cocotb.log.info(self.stats())
+            pendingRefs = sum(len(queue) for queue in self.refs.values())
+            pendingUuts = sum(len(queue) for queue in self.uuts.values())
+            if pendingRefs or pendingUuts:
+                raise TestFailure("%s ends with %d expected and %d observed transactions unmatched" % (self.path(), pendingRefs, pendingUuts))
@@ -0,0 +1,114 @@
+import random
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Unsigned machine words used to slice a getrandbits() block into fields
+wordTypecodes = [typecode for typecode in "BHILQ" if array(typecode).itemsize in (1, 2, 4, 8)]
+wordTypecodes.sort(key=lambda typecode: array(typecode).itemsize)
+
+
+# Seeded source of random field values, drawn by batches and handed out one at a time.
+# NumPy is used when it is installed. Without it, each batch is a single getrandbits() block sliced into fields, one
+# generator call per batch rather than per value. Batches start small and double at each refill up
+# to batchSize, so rarely used widths/ranges don't preallocate a full batch.
+# The seed is taken from the global random module by default so random.seed() at the test start keeps runs reproducible
+class StimulusPool:
+    def __init__(self, seed = None, batchSize = 4096, firstBatchSize = 64):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.batchSize = batchSize
+        self.firstBatchSize = firstBatchSize
+        self.batchSizes = {}
+        self.bitsBuffers = {}
+        self.intBuffers = {}
+        self.uniformBuffer = []
+        if numpy is not None:
+            self.generator = numpy.random.default_rng(seed)
+        else:
+            self.generator = random.Random(seed)
+
+    def _nextBatchSize(self, key):
+        size = self.batchSizes.get(key, self.firstBatchSize)
+        self.batchSizes[key] = min(size * 2, self.batchSize)
+        return size
+
+    def _fillBits(self, width, count):
+        generator = self.generator
+        if numpy is None:
+            mask = (1 << width) - 1
+            for typecode in wordTypecodes:
+                size = array(typecode).itemsize
+                if width <= size * 8:
+                    words = array(typecode, generator.getrandbits(8 * size * count).to_bytes(size * count, "little"))
+                    if width == size * 8:
+                        return words.tolist()
+                    return [word & mask for word in words]
+            size = (width + 7) // 8
+            raw = generator.getrandbits(8 * size * count).to_bytes(size * count, "little")
+            fromBytes = int.from_bytes
+            return [fromBytes(raw[i:i + size], "little") & mask for i in range(0, size * count, size)]
+        values = [0] * count
+        shift = 0
+        while shift < width:
+            chunk = min(width - shift, 64)
+            draw = generator.integers(0, (1 << chunk) - 1, size=count, dtype=numpy.uint64, endpoint=True).tolist()
+            values = [value | (part << shift) for value, part in zip(values, draw)]
+            shift += chunk
+        return values
+
+    # Each draw pops from a prefilled list, the batch is only regenerated once consumed
+    # Uniform value of the given bit width
+    def bits(self, width):
+        buffer = self.bitsBuffers.get(width)
+        if not buffer:
+            if width <= 0:
+                return 0
+            buffer = self._fillBits(width, self._nextBatchSize(width))
+            self.bitsBuffers[width] = buffer
+        return buffer.pop()
+
+    # Uniform integer in [low, high]
+    def randint(self, low, high):
+        span = high - low + 1
+        if numpy is None:
+            # Rejection on the bits buffer of the range width, shared by every range of that width
+            width = (span - 1).bit_length()
+            while True:
+                value = self.bits(width)
+                if value < span:
+                    return low + value
+        key = (low, high)
+        buffer = self.intBuffers.get(key)
+        if not buffer:
+            buffer = self.generator.integers(low, high, size=self._nextBatchSize(key), endpoint=True).tolist()
+            self.intBuffers[key] = buffer
+        return buffer.pop()
+
+    # Uniform float in [0, 1)
+    def uniform(self):
+        if not self.uniformBuffer:
+            count = self._nextBatchSize("uniform")
+            if numpy is None:
+                self.uniformBuffer = [value * (1.0 / (1 << 53)) for value in self._fillBits(53, count)]
+            else:
+                self.uniformBuffer = self.generator.random(count).tolist()
+        return self.uniformBuffer.pop()
+
+    def bool(self, probability = 0.5):
+        return self.uniform() < probability
+
+    def choice(self, values, weights = None):
+        if weights is None:
+            return values[self.randint(0, len(values) - 1)]
+        cumulated = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            cumulated.append(total)
+        return values[min(bisect_right(cumulated, self.uniform() * total), len(values) - 1)]
@@ -0,0 +1,117 @@
+import cocotb
+from cocotb.triggers import RisingEdge
+from cocotblib.Stream import Transaction
+from cocotblib.misc import BoolRandomizer
+
+
+# One coroutine per clock/reset pair servicing every stream agent registered on it :
+# the handshakes are sampled once per stream, then monitors, masters and slaves are run in that order
+class ClockAgentScheduler:
+    schedulers = {}
+
+    @staticmethod
+    def get(clk, reset):
+        key = (id(clk), id(reset))
+        scheduler = ClockAgentScheduler.schedulers.get(key)
+        # cocotb kills the forked coroutines at the end of each test
+        if scheduler is None or getattr(scheduler.thread, "_finished", False):
+            scheduler = ClockAgentScheduler(clk, reset)
+            ClockAgentScheduler.schedulers[key] = scheduler
+        return scheduler
+
+    def __init__(self, clk, reset):
+        self.clk = clk
+        self.reset = reset
+        self.monitors = []
+        self.masters = []
+        self.slaves = []
+        self.fires = {}
+        self.cycle = 0
+        self.thread = cocotb.fork(self.run())
+
+    def fire(self, stream):
+        key = id(stream)
+        fire = self.fires.get(key)
+        if fire is None:
+            fire = int(stream.valid) == 1 and int(stream.ready) == 1
+            self.fires[key] = fire
+        return fire
+
+    @cocotb.coroutine
+    def run(self):
+        clk = self.clk
+        reset = self.reset
+        while True:
+            yield RisingEdge(clk)
+            self.cycle += 1
+            self.fires.clear()
+            inReset = reset is not None and int(reset) == 1
+            for monitor in self.monitors:
+                monitor.update(self, inReset)
+            for master in self.masters:
+                master.update(self, inReset)
+            for slave in self.slaves:
+                slave.update(self, inReset)
+
+
+class StreamDriverMaster:
+    def __init__(self, stream, transactor, clk, reset):
+        self.stream = stream
+        self.transactor = transactor
+        self.elements = list(stream.payload.nameToElement.items())
+        self.valid = False
+        stream.valid <= 0
+        ClockAgentScheduler.get(clk, reset).masters.append(self)
+
+    def update(self, scheduler, inReset):
+        stream = self.stream
+        if inReset:
+            if self.valid:
+                stream.valid <= 0
+                self.valid = False
+            return
+        if self.valid and not scheduler.fire(stream):
+            return
+        trans = self.transactor()
+        if trans is None:
+            if self.valid:
+                stream.valid <= 0
+                self.valid = False
+            return
+        for name, handle in self.elements:
+            value = getattr(trans, name, None)
+            if value is not None:
+                handle <= value
+        if not self.valid:
+            stream.valid <= 1
+            self.valid = True
+
+
+class StreamDriverSlave:
+    def __init__(self, stream, clk, reset):
+        self.stream = stream
+        self.randomizer = BoolRandomizer()
+        self.ready = None
+        ClockAgentScheduler.get(clk, reset).slaves.append(self)
+
+    def update(self, scheduler, inReset):
+        ready = self.randomizer.get()
+        if ready != self.ready:
+            self.stream.ready <= ready
+            self.ready = ready
+
+
+class StreamMonitor:
+    def __init__(self, stream, callback, clk, reset):
+        self.stream = stream
+        self.callback = callback
+        self.elements = list(stream.payload.nameToElement.items())
+        ClockAgentScheduler.get(clk, reset).monitors.append(self)
+
+    def update(self, scheduler, inReset):
+        if inReset or not scheduler.fire(self.stream):
+            return
+        trans = Transaction()
+        for name, handle in self.elements:
+            setattr(trans, name, int(handle))
+        self.callback(trans)
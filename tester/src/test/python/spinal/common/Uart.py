@@ -0,0 +1,112 @@
+import cocotb
+from cocotb.result import TestFailure, ReturnValue
+from cocotb.triggers import Edge, FallingEdge, RisingEdge, Timer
+from cocotb.utils import get_sim_time
+
+UartParityType_NONE = 0
+UartParityType_EVEN = 1
+UartParityType_ODD  = 2
+
+UartStopType_ONE = 0
+UartStopType_TWO = 1
+
+
+class UartFrameConfig:
+    def __init__(self, dataLength, parity, stop, clockDivider, samplePerSymbol = 8):
+        self.dataBits = dataLength + 1
+        self.parity = parity
+        self.stopBits = stop + 1
+        self.baudCycles = (clockDivider + 1) * samplePerSymbol
+
+
+# Reads the io_uart_config_* like signals of a UartCtrl, once per frame
+class UartConfigReader:
+    def __init__(self, root, prefix = "io_uart_config_", samplePerSymbol = 8):
+        self.dataLength = getattr(root, prefix + "frame_dataLength")
+        self.parity = getattr(root, prefix + "frame_parity")
+        self.stop = getattr(root, prefix + "frame_stop")
+        self.clockDivider = getattr(root, prefix + "clockDivider")
+        self.samplePerSymbol = samplePerSymbol
+
+    def __call__(self):
+        return UartFrameConfig(int(self.dataLength), int(self.parity), int(self.stop), int(self.clockDivider), self.samplePerSymbol)
+
+
+# Decodes the frames of a UART line. It synchronizes on the start bit falling edge, then each bit is sampled once
+# at its center, its stability over the whole bit being checked with Edge triggers instead of a per cycle
+# assertion. Decoded data are given to the listeners
+class UartLineMonitor:
+    def __init__(self, pin, clk, config, name = "uart"):
+        self.pin = pin
+        self.clk = clk
+        self.config = config
+        self.name = name
+        self.listeners = []
+        self.clockPeriod = None
+        self.frameCounter = 0
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        return cocotb.fork(self.run())
+
+    @cocotb.coroutine
+    def measureClock(self):
+        yield RisingEdge(self.clk)
+        startAt = get_sim_time()
+        yield RisingEdge(self.clk)
+        self.clockPeriod = get_sim_time() - startAt
+
+    @cocotb.coroutine
+    def run(self):
+        yield self.measureClock()
+        while True:
+            yield FallingEdge(self.pin)
+            data = yield self.readFrame(get_sim_time(), self.config())
+            self.frameCounter += 1
+            for listener in self.listeners:
+                listener(data)
+
+    @cocotb.coroutine
+    def readFrame(self, startAt, frame):
+        bitTime = frame.baudCycles * self.clockPeriod
+        if (yield self.readBit(startAt, 0, bitTime, "start")) != 0:
+            raise TestFailure("%s : start bit not stable at %d" % (self.name, startAt))
+
+        data = 0
+        parity = 0 if frame.parity == UartParityType_EVEN else 1
+        for i in range(frame.dataBits):
+            value = yield self.readBit(startAt, 1 + i, bitTime, "data %d" % i)
+            data |= value << i
+            parity ^= value
+        index = 1 + frame.dataBits
+
+        if frame.parity != UartParityType_NONE:
+            if (yield self.readBit(startAt, index, bitTime, "parity")) != parity:
+                raise TestFailure("%s : wrong parity bit at %d, data=0x%X" % (self.name, get_sim_time(), data))
+            index += 1
+
+        for i in range(frame.stopBits):
+            if (yield self.readBit(startAt, index + i, bitTime, "stop %d" % i)) != 1:
+                raise TestFailure("%s : stop bit %d low at %d, data=0x%X" % (self.name, i, get_sim_time(), data))
+        raise ReturnValue(data)
+
+    # Bits are placed from the frame start to avoid any drift. The line is sampled at the bit center and must not
+    # move from one clock after the bit boundary up to one clock before the next one
+    @cocotb.coroutine
+    def readBit(self, startAt, index, bitTime, label):
+        bitStart = startAt + index * bitTime
+        margin = min(self.clockPeriod, bitTime // 4)
+        yield Timer(bitStart + margin - get_sim_time())
+        yield self.waitStable(bitStart + bitTime // 2, label)
+        value = int(self.pin)
+        yield self.waitStable(bitStart + bitTime - margin, label)
+        raise ReturnValue(value)
+
+    @cocotb.coroutine
+    def waitStable(self, until, label):
+        edge = Edge(self.pin)
+        trigger = yield [edge, Timer(until - get_sim_time())]
+        if trigger is edge:
+            raise TestFailure("%s : glitch during the %s bit at %d" % (self.name, label, get_sim_time()))
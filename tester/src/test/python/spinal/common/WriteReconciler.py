@@ -0,0 +1,61 @@
+from collections import deque
+
+
+# Pending writes indexed by (transaction id, destination slave), oldest first
+class WriteReconciler:
+    def __init__(self):
+        self.pending = {}
+        self.count = 0
+
+    def add(self, hid, slave, write):
+        key = (hid, slave)
+        queue = self.pending.get(key)
+        if queue is None:
+            queue = deque()
+            self.pending[key] = queue
+        queue.append(write)
+        self.count += 1
+
+    def peek(self, hid, slave):
+        queue = self.pending.get((hid, slave))
+        return queue[0] if queue else None
+
+    # Remove and return the oldest write for this id and slave, None if there is none
+    def retire(self, hid, slave):
+        queue = self.pending.get((hid, slave))
+        if not queue:
+            return None
+        self.count -= 1
+        return queue.popleft()
+
+    def empty(self):
+        return self.count == 0
+
+    def __len__(self):
+        return self.count
+
+
+# Pair the AW commands with their W beats as seen on one slave port
+class WriteBurstAssembler:
+    def __init__(self):
+        self.cmds = deque()
+        self.datas = deque()
+
+    def addCmd(self, cmd):
+        self.cmds.append(cmd)
+
+    def addData(self, data):
+        self.datas.append(data)
+
+    # Return (cmd, datas) once every beat of the oldest command is there, else None
+    def pop(self):
+        if not self.cmds:
+            return None
+        beatCount = self.cmds[0].len + 1
+        if len(self.datas) < beatCount:
+            return None
+        datas = [self.datas.popleft() for i in range(beatCount)]
+        return self.cmds.popleft(), datas
+
+    def empty(self):
+        return not self.cmds and not self.datas